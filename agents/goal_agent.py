@@ -4,13 +4,13 @@ Helps with SIP calculations, goal tracking, and future planning
 """
 from llm.llm_wrapper import invoke_llm
 from llm.prompts import get_agent_prompt
-from database.json_store import PortfolioStore
+from database.json_store import get_store
 import config
 import json
 
 class GoalAgent:
     def __init__(self):
-        self.store = PortfolioStore()
+        self.store = get_store()
     
     def plan(self, query: str, stream: bool = False):
         """
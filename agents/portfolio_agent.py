@@ -1,13 +1,13 @@
 from llm.llm_wrapper import invoke_llm
 from llm.prompts import get_agent_prompt
-from database.json_store import PortfolioStore
+from database.json_store import get_store
 from agents.rag_service import RAGService
 import config
 import json
 
 class PortfolioAgent:
     def __init__(self):
-        self.store = PortfolioStore()
+        self.store = get_store()
         self.rag_service = RAGService()
     
     def analyze(self, query: str, stream: bool = False):
@@ -7,13 +7,20 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from typing import Dict, List, Optional
+import heapq
 import json
-from database.json_store import PortfolioStore
+from database.json_store import get_store
 from vector_db.faiss_store import LocalVectorStore
 from llm.llm_wrapper import invoke_llm
 import config
 
 
+def _raw_data(metadata: Dict) -> Dict:
+    """Raw record stored with a vector (older indexes stored it as a JSON string)"""
+    data = metadata['data']
+    return json.loads(data) if isinstance(data, str) else data
+
+
 class RAGService:
     """
     Centralized RAG service for portfolio queries.
@@ -22,8 +29,8 @@ class RAGService:
     """
     
     def __init__(self):
-        self.store = PortfolioStore()
-        self.vector_store = LocalVectorStore()
+        self.store = get_store()
+        self.vector_store = LocalVectorStore(read_only=True)
     
     def analyze_query(self, query: str) -> Dict:
         """
@@ -110,7 +117,7 @@ Examples:
             sips = []
             for res in search_results:
                 if res['metadata'].get('type') == 'sip':
-                    sip_data = json.loads(res['metadata']['data'])
+                    sip_data = _raw_data(res['metadata'])
                     # Apply filters
                     if filters.get('active_only') and not sip_data.get('is_active'):
                         continue
@@ -130,7 +137,7 @@ Examples:
             holdings = []
             for res in search_results:
                 if res['metadata'].get('type') == 'holding':
-                    holding_data = json.loads(res['metadata']['data'])
+                    holding_data = _raw_data(res['metadata'])
                     # Apply filters
                     if filters.get('fund_category') and holding_data.get('type') != filters['fund_category']:
                         continue
@@ -141,11 +148,17 @@ Examples:
                 holdings = portfolio.get('holdings', [])
             
             # Sort and limit
+            limit = filters.get('limit')
             if filters.get('sort') == 'value_desc':
-                holdings = sorted(holdings, key=lambda x: x.get('current_value', 0), reverse=True)
+                value_key = lambda x: x.get('current_value', 0)
+                if limit:
+                    # Only the top entries are needed, skip the full sort
+                    holdings = heapq.nlargest(limit, holdings, key=value_key)
+                else:
+                    holdings = sorted(holdings, key=value_key, reverse=True)
             
-            if filters.get('limit'):
-                holdings = holdings[:filters['limit']]
+            if limit:
+                holdings = holdings[:limit]
             
             result['holdings'] = holdings
             result['count'] = len(holdings)
@@ -159,11 +172,11 @@ Examples:
             for res in search_results:
                 metadata = res['metadata']
                 if metadata.get('type') == 'holding':
-                    holding_data = json.loads(metadata['data'])
+                    holding_data = _raw_data(metadata)
                     if fund_name.lower() in holding_data.get('scheme_name', '').lower():
                         holdings.append(holding_data)
                 elif metadata.get('type') == 'sip':
-                    sip_data = json.loads(metadata['data'])
+                    sip_data = _raw_data(metadata)
                     if fund_name.lower() in sip_data.get('scheme_name', '').lower():
                         sips.append(sip_data)
             
@@ -16,7 +16,8 @@ from core.unified_processor import (
     aggregate_holdings_for_display,
     match_sips_with_holdings
 )
-from database.json_store import PortfolioStore
+from database.json_store import get_store
+from utils.formatters import format_currency, format_percentage
 from vector_db.portfolio_indexer import index_portfolio_data
 from agents.orchestrator import MultiAgentOrchestrator
 
@@ -26,7 +27,7 @@ app.config['SECRET_KEY'] = os.urandom(24)
 logger.info("Initializing Flask application")
 
 # Initialize components
-store = PortfolioStore()
+store = get_store()
 orchestrator = MultiAgentOrchestrator()
 
 logger.info("Components initialized successfully")
@@ -36,6 +37,41 @@ UPLOAD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "uploads")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 
+# Derived dashboard data, reused until the stored portfolio changes
+_dashboard_cache = {'key': None, 'data': None}
+
+
+def _get_dashboard_holdings(portfolio):
+    """
+    Aggregate and sort holdings for the dashboard.
+    Keyed on the portfolio's last_updated stamp so page reloads skip the work.
+    
+    Returns:
+        Tuple of (aggregated_holdings, has_broker_info)
+    """
+    cache_key = portfolio.get('last_updated')
+    if cache_key and _dashboard_cache['key'] == cache_key:
+        return _dashboard_cache['data']
+    
+    holdings = portfolio.get('holdings', [])
+    logger.info(f"Dashboard: Processing {len(holdings)} holdings")
+    
+    # Aggregate holdings for display
+    aggregated_holdings, aggregation_map = aggregate_holdings_for_display(holdings)
+    logger.info(f"Dashboard: Aggregated to {len(aggregated_holdings)} holdings, merged {len(aggregation_map)} duplicates")
+    
+    # Sort by current value
+    aggregated_holdings = sorted(aggregated_holdings, key=lambda x: x.get('current_value', 0), reverse=True)
+    
+    # Check if any holdings have broker info
+    has_broker_info = any(h.get('broker') for h in holdings)
+    logger.info(f"Dashboard: Broker info available: {has_broker_info}")
+    
+    _dashboard_cache['key'] = cache_key
+    _dashboard_cache['data'] = (aggregated_holdings, has_broker_info)
+    return aggregated_holdings, has_broker_info
+
+
 @app.route('/')
 def index():
     """Home page - redirect to dashboard"""
@@ -51,19 +87,7 @@ def dashboard():
             logger.info("No portfolio data found in dashboard")
             return render_template('dashboard.html', summary=None, holdings=[], has_broker_info=False)
         
-        holdings = portfolio.get('holdings', [])
-        logger.info(f"Dashboard: Processing {len(holdings)} holdings")
-        
-        # Aggregate holdings for display
-        aggregated_holdings, aggregation_map = aggregate_holdings_for_display(holdings)
-        logger.info(f"Dashboard: Aggregated to {len(aggregated_holdings)} holdings, merged {len(aggregation_map)} duplicates")
-        
-        # Sort by current value
-        aggregated_holdings = sorted(aggregated_holdings, key=lambda x: x.get('current_value', 0), reverse=True)
-        
-        # Check if any holdings have broker info
-        has_broker_info = any(h.get('broker') for h in holdings)
-        logger.info(f"Dashboard: Broker info available: {has_broker_info}")
+        aggregated_holdings, has_broker_info = _get_dashboard_holdings(portfolio)
         
         return render_template(
             'dashboard.html', 
@@ -165,7 +189,7 @@ def sip_analytics():
         
         if not portfolio or not sips:
             logger.warning("No portfolio or SIP data found")
-            return render_template('sip_analytics.html', analytics=None, active_sips=[], inactive_sips=[], upcoming={'upcoming_sips': [], 'count': 0, 'total_amount': 0})
+            return render_template('sip_analytics.html', analytics=None, active_sips=[], inactive_sips=[])
         
         # Get holdings for matching
         holdings = portfolio.get('holdings', [])
@@ -175,17 +199,26 @@ def sip_analytics():
         enriched_sips = match_sips_with_holdings(sips, holdings)
         logger.info(f"SIP Analytics: Enriched {len(enriched_sips)} SIPs with returns data")
         
-        # Separate active and inactive SIPs (already marked in the data)
-        active_sips = [s for s in enriched_sips if s.get('is_active', False)]
-        inactive_sips = [s for s in enriched_sips if not s.get('is_active', False)]
+        # Separate active and inactive SIPs (already marked in the data) and
+        # accumulate the active SIP totals in the same pass
+        active_sips = []
+        inactive_sips = []
+        monthly_outflow = 0
+        total_sip_invested = 0
+        total_sip_current = 0
+        for sip in enriched_sips:
+            if not sip.get('is_active', False):
+                inactive_sips.append(sip)
+                continue
+            
+            active_sips.append(sip)
+            if sip.get('frequency', '').lower() == 'monthly':
+                monthly_outflow += sip.get('sip_amount', 0)
+            total_sip_invested += sip.get('total_invested_sip', 0)
+            total_sip_current += sip.get('current_value', 0)
         
         logger.info(f"SIP Analytics: {len(active_sips)} active, {len(inactive_sips)} inactive")
         
-        # Calculate analytics
-        monthly_outflow = sum(s.get('sip_amount', 0) for s in active_sips if s.get('frequency', '').lower() == 'monthly')
-        total_sip_invested = sum(s.get('total_invested_sip', 0) for s in active_sips)
-        total_sip_current = sum(s.get('current_value', 0) for s in active_sips)
-        
         analytics = {
             'data': {
                 'total_sips': len(enriched_sips),
@@ -199,66 +232,6 @@ def sip_analytics():
             }
         }
         
-        # Calculate upcoming SIPs (next 30 days)
-        from datetime import datetime, date, timedelta
-        today = date.today()
-        upcoming = []
-        total_amount = 0
-        
-        for sip in active_sips:
-            last_date = sip.get('last_installment_date')
-            frequency = sip.get('frequency', 'Monthly')
-            
-            if last_date:
-                try:
-                    # Handle date object or string
-                    if isinstance(last_date, str):
-                        last_date_obj = datetime.strptime(last_date, '%Y-%m-%d').date()
-                    elif isinstance(last_date, date):
-                        last_date_obj = last_date
-                    else:
-                        continue
-                    
-                    # Calculate next date based on frequency
-                    if frequency.lower() == 'monthly':
-                        # Add roughly a month
-                        next_month = last_date_obj.month + 1 if last_date_obj.month < 12 else 1
-                        next_year = last_date_obj.year if last_date_obj.month < 12 else last_date_obj.year + 1
-                        try:
-                            next_date = date(next_year, next_month, last_date_obj.day)
-                        except ValueError:
-                            # Handle month-end dates (e.g., Jan 31 -> Feb 28)
-                            next_date = date(next_year, next_month, 28)
-                    elif frequency.lower() == 'quarterly':
-                        next_date = last_date_obj + timedelta(days=90)
-                    elif frequency.lower() == 'weekly':
-                        next_date = last_date_obj + timedelta(days=7)
-                    else:
-                        next_date = last_date_obj + timedelta(days=30)
-                    
-                    days_until = (next_date - today).days
-                    
-                    if 0 <= days_until <= 30:
-                        upcoming.append({
-                            'scheme_name': sip.get('scheme_name', ''),
-                            'sip_amount': sip.get('sip_amount', 0),
-                            'date': next_date.strftime('%Y-%m-%d'),
-                            'days_until': days_until,
-                            'broker': sip.get('broker', '')
-                        })
-                        total_amount += sip.get('sip_amount', 0)
-                except Exception as e:
-                    logger.warning(f"Error calculating next SIP date for {sip.get('scheme_name', 'Unknown')}: {e}")
-                    continue
-        
-        upcoming.sort(key=lambda x: x['days_until'])
-        
-        upcoming_data = {
-            'upcoming_sips': upcoming,
-            'count': len(upcoming),
-            'total_amount': total_amount
-        }
-        
         # Sort by current value
         active_sips = sorted(active_sips, key=lambda x: x.get('current_value', 0), reverse=True)
         inactive_sips = sorted(inactive_sips, key=lambda x: x.get('scheme_name', ''))
@@ -269,8 +242,7 @@ def sip_analytics():
             'sip_analytics.html', 
             analytics=analytics, 
             active_sips=active_sips,
-            inactive_sips=inactive_sips,
-            upcoming=upcoming_data
+            inactive_sips=inactive_sips
         )
     
     except Exception as e:
@@ -278,7 +250,7 @@ def sip_analytics():
         logger.error(f'SIP analytics error: {str(e)}')
         logger.error(f'SIP analytics error traceback: {traceback.format_exc()}')
         flash(f'Error loading SIP analytics: {str(e)}', 'error')
-        return render_template('sip_analytics.html', analytics=None, active_sips=[], inactive_sips=[], upcoming={'upcoming_sips': [], 'count': 0, 'total_amount': 0})
+        return render_template('sip_analytics.html', analytics=None, active_sips=[], inactive_sips=[])
 
 
 @app.route('/chat', methods=['GET', 'POST'])
@@ -340,33 +312,14 @@ def currency_filter(value):
         value = float(value)
     except (ValueError, TypeError):
         return '₹0'
-        
-    def format_indian(n):
-        s = str(int(n))
-        if len(s) <= 3:
-            return s
-        # Last 3 digits
-        last3 = s[-3:]
-        # Remaining digits
-        remaining = s[:-3]
-        # Group by 2
-        groups = []
-        while remaining:
-            groups.append(remaining[-2:])
-            remaining = remaining[:-2]
-        
-        groups.reverse()
-        return ",".join(groups) + "," + last3
-
-    return f"₹{format_indian(value)}"
+    
+    return format_currency(value)
 
 
 @app.template_filter('percentage')
 def percentage_filter(value):
     """Format as percentage"""
-    if value is None:
-        return '0.00%'
-    return f"{value:.2f}%"
+    return format_percentage(value)
 
 
 @app.template_filter('truncate_text')
@@ -2,6 +2,7 @@
 Enhanced financial calculations for MF Central data
 """
 import pyxirr
+import heapq
 from datetime import datetime, date, timedelta
 from typing import List, Dict, Optional, Tuple
 import pandas as pd
@@ -238,7 +239,36 @@ def calculate_allocation(holdings: List[Dict]) -> Dict[str, float]:
     Returns:
         Dict with allocation by type and category
     """
-    total_value = sum(h.get('current_value', 0) for h in holdings)
+    total_value = 0
+    equity_value = debt_value = hybrid_value = gold_value = 0
+    large_cap = mid_cap = small_cap = flexi_cap = 0
+    
+    # Single pass over holdings for type and category buckets
+    for h in holdings:
+        value = h.get('current_value', 0)
+        fund_type = h.get('type', '').lower()
+        total_value += value
+        
+        # Type-based allocation
+        if 'equity' in fund_type:
+            equity_value += value
+            
+            # Category-based allocation (for equity funds)
+            scheme_name = h.get('scheme_name', '').lower()
+            if 'large' in scheme_name:
+                large_cap += value
+            if 'mid' in scheme_name:
+                mid_cap += value
+            if 'small' in scheme_name:
+                small_cap += value
+            if 'flexi' in scheme_name:
+                flexi_cap += value
+        if 'debt' in fund_type:
+            debt_value += value
+        if 'hybrid' in fund_type or 'balanced' in fund_type:
+            hybrid_value += value
+        if 'gold' in fund_type:
+            gold_value += value
     
     if total_value == 0:
         return {
@@ -246,43 +276,8 @@ def calculate_allocation(holdings: List[Dict]) -> Dict[str, float]:
             'large_cap': 0, 'mid_cap': 0, 'small_cap': 0, 'flexi_cap': 0
         }
     
-    # Type-based allocation
-    equity_value = sum(
-        h.get('current_value', 0) for h in holdings 
-        if 'equity' in h.get('type', '').lower()
-    )
-    debt_value = sum(
-        h.get('current_value', 0) for h in holdings 
-        if 'debt' in h.get('type', '').lower()
-    )
-    hybrid_value = sum(
-        h.get('current_value', 0) for h in holdings 
-        if 'hybrid' in h.get('type', '').lower() or 'balanced' in h.get('type', '').lower()
-    )
-    gold_value = sum(
-        h.get('current_value', 0) for h in holdings 
-        if 'gold' in h.get('type', '').lower()
-    )
     other_value = total_value - equity_value - debt_value - hybrid_value - gold_value
     
-    # Category-based allocation (for equity funds)
-    large_cap = sum(
-        h.get('current_value', 0) for h in holdings 
-        if 'large' in h.get('scheme_name', '').lower() and 'equity' in h.get('type', '').lower()
-    )
-    mid_cap = sum(
-        h.get('current_value', 0) for h in holdings 
-        if 'mid' in h.get('scheme_name', '').lower() and 'equity' in h.get('type', '').lower()
-    )
-    small_cap = sum(
-        h.get('current_value', 0) for h in holdings 
-        if 'small' in h.get('scheme_name', '').lower() and 'equity' in h.get('type', '').lower()
-    )
-    flexi_cap = sum(
-        h.get('current_value', 0) for h in holdings 
-        if 'flexi' in h.get('scheme_name', '').lower() and 'equity' in h.get('type', '').lower()
-    )
-    
     return {
         # Type allocation
         'equity': round((equity_value / total_value) * 100, 2),
@@ -322,12 +317,13 @@ def calculate_portfolio_metrics(holdings: List[Dict], transactions: List[Dict])
     # Get allocation
     allocation = calculate_allocation(holdings)
     
-    # Find top and bottom performers
-    sorted_holdings = sorted(
-        holdings, 
-        key=lambda x: x.get('gain_loss_percent', 0), 
-        reverse=True
-    )
+    # Find top and bottom performers (partial selection, no full sort)
+    def return_key(h):
+        return h.get('gain_loss_percent', 0)
+    
+    top_holdings = heapq.nlargest(5, holdings, key=return_key)
+    # Worst performers keep the best-to-worst order of the old sorted tail
+    worst_holdings = heapq.nsmallest(5, holdings, key=return_key)[::-1]
     
     top_performers = [
         {
@@ -336,7 +332,7 @@ def calculate_portfolio_metrics(holdings: List[Dict], transactions: List[Dict])
             'current_value': h.get('current_value', 0),
             'xirr': h.get('xirr', 0)
         }
-        for h in sorted_holdings[:5]
+        for h in top_holdings
     ]
     
     worst_performers = [
@@ -346,7 +342,7 @@ def calculate_portfolio_metrics(holdings: List[Dict], transactions: List[Dict])
             'current_value': h.get('current_value', 0),
             'xirr': h.get('xirr', 0)
         }
-        for h in sorted_holdings[-5:]
+        for h in worst_holdings
     ]
     
     return {
@@ -5,6 +5,12 @@ Parses the detailed CAS report Excel file from MF Central
 import pandas as pd
 from typing import Dict, List
 
+# Report columns read into holdings; everything else in the sheet is ignored
+HOLDING_COLUMNS = [
+    'Scheme Name', 'AMC Name', 'Category', 'Folio No.',
+    'Invested Value', 'Current Value', 'Profit/Loss', 'Units'
+]
+
 
 def parse_mf_central_excel(excel_path: str) -> Dict:
     """
@@ -34,9 +40,13 @@ def parse_mf_central_excel(excel_path: str) -> Dict:
     # Remove empty rows
     df = df.dropna(subset=['Scheme Name'])
     
-    # Parse holdings
+    # Keep only the columns we read so each record is built from a fixed schema
+    # (missing columns still fall back to the row.get() defaults below)
+    df = df[[col for col in HOLDING_COLUMNS if col in df.columns]]
+    
+    # Parse holdings (plain dict records avoid building a Series per row)
     holdings = []
-    for _, row in df.iterrows():
+    for row in df.to_dict('records'):
         scheme = row.get('Scheme Name')
         if pd.isna(scheme) or str(scheme).strip() == '':
             continue
@@ -10,6 +10,7 @@ import json
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime, date, timedelta
 from collections import defaultdict
+from functools import lru_cache
 import re
 
 
@@ -186,47 +187,56 @@ class MFCentralParser:
         - This handles delayed payments, bank holidays, and temporary pauses
         """
         
-        # Group SIP transactions by scheme + folio (unique combination)
+        # Aggregate SIP transactions by scheme + folio (unique combination) in a
+        # single pass, tracking only first/last installment and running totals
+        # instead of collecting and sorting each group
         sip_groups = {}
         
         for txn in transactions:
-            if txn['transaction_type'] == 'sip':
-                # Use scheme + folio as unique key to avoid duplicates
-                key = f"{txn['scheme_name']}||{txn['folio_number']}"
-                
-                if key not in sip_groups:
-                    sip_groups[key] = {
-                        'scheme_name': txn['scheme_name'],
-                        'folio_number': txn['folio_number'],
-                        'transactions': []
-                    }
-                
-                sip_groups[key]['transactions'].append(txn)
+            if txn['transaction_type'] != 'sip':
+                continue
+            
+            # Use scheme + folio as unique key to avoid duplicates
+            key = (txn['scheme_name'], txn['folio_number'])
+            group = sip_groups.get(key)
+            if group is None:
+                group = sip_groups[key] = {
+                    'first_txn': None,
+                    'last_txn': None,
+                    'count': 0,
+                    'total_invested': 0
+                }
+            
+            # Skip None dates
+            trade_date = txn.get('trade_date')
+            if trade_date is None:
+                continue
+            
+            group['count'] += 1
+            if txn.get('amount'):
+                group['total_invested'] += abs(float(txn['amount']))
+            
+            # Ties keep the earliest-seen as first and latest-seen as last,
+            # matching a stable sort by trade_date
+            if group['first_txn'] is None or trade_date < group['first_txn']['trade_date']:
+                group['first_txn'] = txn
+            if group['last_txn'] is None or trade_date >= group['last_txn']['trade_date']:
+                group['last_txn'] = txn
         
         # Analyze each SIP group
         all_sips = []
         
-        for key, group in sip_groups.items():
-            txns = group['transactions']
-            if not txns:
-                continue
-            
-            # Filter out None dates and sort by date
-            valid_txns = [t for t in txns if t.get('trade_date') is not None]
-            if not valid_txns:
+        for (scheme_name, folio_number), group in sip_groups.items():
+            if not group['count']:
                 continue
-                
-            valid_txns.sort(key=lambda x: x['trade_date'])
             
             # Get first and last transaction
-            first_txn = valid_txns[0]
-            last_txn = valid_txns[-1]
+            first_txn = group['first_txn']
+            last_txn = group['last_txn']
             first_date = first_txn['trade_date']
             last_date = last_txn['trade_date']
             
-            # Calculate total invested and most recent SIP amount
-            amounts = [abs(float(t['amount'])) for t in valid_txns if t.get('amount')]
-            total_invested = sum(amounts)
+            total_invested = group['total_invested']
             
             # Use the most recent SIP amount, not average
             recent_amount = abs(float(last_txn['amount'])) if last_txn.get('amount') else 0
@@ -252,13 +262,13 @@ class MFCentralParser:
             is_active = days_since_last <= grace_period
             
             sip_data = {
-                'scheme_name': group['scheme_name'],
-                'folio_number': group['folio_number'],
+                'scheme_name': scheme_name,
+                'folio_number': folio_number,
                 'sip_amount': round(recent_amount, 2),
                 'frequency': frequency,
                 'first_installment_date': first_date,
                 'last_installment_date': last_date,
-                'total_installments': len(valid_txns),
+                'total_installments': group['count'],
                 'total_invested': round(total_invested, 2),
                 'broker': last_txn.get('broker', 'Unknown'),
                 'is_active': is_active,
@@ -283,22 +293,27 @@ class MFCentralParser:
         })
         
         for txn in transactions:
-            if txn['transaction_type'] in ['purchase', 'sip']:
-                broker = txn['broker']
-                if not broker or broker == 'Unknown':
-                    continue
-                
-                stats = broker_stats[broker]
-                stats['total_invested'] += abs(txn['amount'])
-                stats['schemes'].add(txn['scheme_name'])
-                stats['transaction_count'] += 1
-                
-                txn_date = txn.get('trade_date')
-                if txn_date:  # Only process if date exists
-                    if stats['first_transaction'] is None or txn_date < stats['first_transaction']:
-                        stats['first_transaction'] = txn_date
-                    if stats['last_transaction'] is None or txn_date > stats['last_transaction']:
-                        stats['last_transaction'] = txn_date
+            if txn['transaction_type'] not in ('purchase', 'sip'):
+                continue
+            
+            broker = txn['broker']
+            if not broker or broker == 'Unknown':
+                continue
+            
+            stats = broker_stats[broker]
+            stats['total_invested'] += abs(txn['amount'])
+            stats['schemes'].add(txn['scheme_name'])
+            stats['transaction_count'] += 1
+            
+            txn_date = txn.get('trade_date')
+            if txn_date:  # Only process if date exists
+                # Read each bound once instead of twice per comparison
+                first = stats['first_transaction']
+                if first is None or txn_date < first:
+                    stats['first_transaction'] = txn_date
+                last = stats['last_transaction']
+                if last is None or txn_date > last:
+                    stats['last_transaction'] = txn_date
         
         # Convert sets to lists for JSON serialization
         for broker, stats in broker_stats.items():
@@ -370,8 +385,10 @@ class MFCentralParser:
     
     # Helper methods
     
-    def _parse_date(self, date_str: str) -> date:
-        """Parse date from various formats"""
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _parse_date(date_str: str) -> date:
+        """Parse date from various formats (cached; trade dates repeat heavily)"""
         if not date_str:
             return None
         
@@ -388,8 +405,14 @@ class MFCentralParser:
         except:
             return None
     
-    def _classify_transaction_type(self, txn_type_str: str) -> str:
-        """Classify transaction type into standard categories"""
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _classify_transaction_type(txn_type_str: str) -> str:
+        """
+        Classify transaction type into standard categories.
+        Statements repeat a handful of type strings across thousands of rows,
+        so results are cached per distinct string.
+        """
         txn_type_lower = txn_type_str.lower()
         
         if 'sip' in txn_type_lower or 'systematic investment' in txn_type_lower:
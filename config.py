@@ -71,7 +71,7 @@ STRATEGY_TIMEOUT = int(os.getenv("STRATEGY_TIMEOUT", "120"))     # Strategy agen
 # EMBEDDING CONFIGURATION
 # =============================================================================
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
-EMBEDDING_DIMENSION = int(os.getenv("EMBEDDING_DIMENSION", "1536"))
+EMBEDDING_DIMENSION = int(os.getenv("EMBEDDING_DIMENSION", "512"))  # Shortened via the `dimensions` API parameter
 
 # =============================================================================
 # VECTOR STORE CONFIGURATION
@@ -6,7 +6,7 @@ import json
 from pathlib import Path
 from typing import Dict, Tuple, Optional
 from cas_import.mf_central_parser import MFCentralParser
-from database.json_store import PortfolioStore
+from database.json_store import get_store
 from vector_db.portfolio_indexer import index_portfolio_data
 
 
@@ -33,6 +33,52 @@ def load_mf_central_files(
     return consolidated_data, transaction_data, detailed_data
 
 
+# Fields that must be present in the first entry of each MF Central file
+REQUIRED_CONSOLIDATED_FIELDS = ('Scheme', 'Folio', 'Unit Balance', 'Current Value(Rs.)')
+REQUIRED_DETAILED_FIELDS = ('Scheme', 'Folio', 'CurrentValue', 'Annualised XIRR')
+
+
+def _compile_structure_validator():
+    """
+    Generate a validator specialised for the fixed MF Central schema.
+
+    The required-field checks are unrolled into straight-line code once at
+    import time, so each validation is a flat sequence of membership tests
+    with no per-field loop.
+    """
+    lines = [
+        "def _validate_structure(consolidated_data, transaction_data, detailed_data):",
+        "    if 'dtTrxnResult' not in consolidated_data:",
+        "        return 'Consolidated file missing dtTrxnResult'",
+        "    if not consolidated_data['dtTrxnResult']:",
+        "        return 'Consolidated file has no holdings'",
+        "    if 'dtTrxnResult' not in transaction_data:",
+        "        return 'Transaction file missing dtTrxnResult'",
+        "    if not isinstance(detailed_data, list):",
+        "        return 'Detailed report should be a list'",
+        "    if not detailed_data:",
+        "        return 'Detailed report is empty'",
+        "    first_holding = consolidated_data['dtTrxnResult'][0]",
+    ]
+    for field in REQUIRED_CONSOLIDATED_FIELDS:
+        lines.append(f"    if {field!r} not in first_holding:")
+        lines.append(f"        return {'Missing field in consolidated data: ' + field!r}")
+    
+    lines.append("    first_detailed = detailed_data[0]")
+    for field in REQUIRED_DETAILED_FIELDS:
+        lines.append(f"    if {field!r} not in first_detailed:")
+        lines.append(f"        return {'Missing field in detailed report: ' + field!r}")
+    
+    lines.append("    return None")
+    
+    namespace = {}
+    exec("\n".join(lines), namespace)
+    return namespace['_validate_structure']
+
+
+_validate_structure = _compile_structure_validator()
+
+
 def validate_mf_central_data(
     consolidated_data: Dict,
     transaction_data: Dict,
@@ -45,41 +91,8 @@ def validate_mf_central_data(
         Tuple of (is_valid, error_message)
     """
     try:
-        # Check consolidated data
-        if 'dtTrxnResult' not in consolidated_data:
-            return False, 'Consolidated file missing dtTrxnResult'
-        
-        if not consolidated_data['dtTrxnResult']:
-            return False, 'Consolidated file has no holdings'
-        
-        # Check transaction data
-        if 'dtTrxnResult' not in transaction_data:
-            return False, 'Transaction file missing dtTrxnResult'
-        
-        # Check detailed data
-        if not isinstance(detailed_data, list):
-            return False, 'Detailed report should be a list'
-        
-        if not detailed_data:
-            return False, 'Detailed report is empty'
-        
-        # Check required fields in first entry
-        required_consolidated_fields = ['Scheme', 'Folio', 'Unit Balance', 'Current Value(Rs.)']
-        first_holding = consolidated_data['dtTrxnResult'][0]
-        
-        for field in required_consolidated_fields:
-            if field not in first_holding:
-                return False, f'Missing field in consolidated data: {field}'
-        
-        # Check detailed report fields
-        required_detailed_fields = ['Scheme', 'Folio', 'CurrentValue', 'Annualised XIRR']
-        first_detailed = detailed_data[0]
-        
-        for field in required_detailed_fields:
-            if field not in first_detailed:
-                return False, f'Missing field in detailed report: {field}'
-        
-        return True, None
+        error = _validate_structure(consolidated_data, transaction_data, detailed_data)
+        return error is None, error
         
     except Exception as e:
         return False, str(e)
@@ -144,8 +157,7 @@ def process_mf_central_data(
     
     # Save to database
     if save_to_db:
-        from database.json_store import PortfolioStore
-        store = PortfolioStore()
+        store = get_store()
         store.save_complete_data(
             portfolio=portfolio_data,
             transactions=[],
@@ -214,7 +226,7 @@ def load_portfolio_from_db() -> Optional[Dict]:
     Returns:
         Portfolio data or None if not found
     """
-    store = PortfolioStore()
+    store = get_store()
     return store.get_portfolio()
 
 
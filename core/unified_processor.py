@@ -8,6 +8,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from typing import Dict, List, Tuple
 from collections import defaultdict
+from functools import lru_cache
 import re
 from cas_import.excel_parser import parse_mf_central_excel
 from cas_import.mf_central_parser import MFCentralParser
@@ -205,10 +206,13 @@ def _calculate_portfolio_xirr(holdings: List[Dict]) -> float:
     return round(weighted_xirr, 2)
 
 
+@lru_cache(maxsize=1024)
 def _normalize_scheme_for_grouping(scheme_name: str) -> str:
     """
     Normalize scheme name for grouping duplicate funds.
     Uses similar logic as MFCentralParser but more aggressive.
+    Cached because the same names are grouped on every dashboard and
+    SIP page load.
     """
     normalized = scheme_name.lower()
     
@@ -263,12 +267,13 @@ def aggregate_holdings_for_display(holdings: List[Dict]) -> Tuple[List[Dict], Di
     
     for normalized_name, group in scheme_groups.items():
         if len(group) == 1:
-            # No aggregation needed
-            holding = group[0].copy()
-            holding['is_aggregated'] = False
-            holding['folio_count'] = 1
-            holding['individual_folios'] = []
-            aggregated_holdings.append(holding)
+            # No aggregation needed - build the display copy in one step
+            aggregated_holdings.append({
+                **group[0],
+                'is_aggregated': False,
+                'folio_count': 1,
+                'individual_folios': []
+            })
         else:
             # Aggregate multiple folios
             aggregated = _aggregate_holdings_group(group)
@@ -350,7 +355,9 @@ def match_sips_with_holdings(sips: List[Dict], holdings: List[Dict]) -> List[Dic
         holding_map[key] = holding
     
     enriched_sips = []
-    for sip in sips.copy():
+    for sip in sips:
+        # Copy so stored SIP records are never modified in place
+        sip = sip.copy()
         base_folio = extract_base_folio(sip['folio_number'])
         normalized_scheme = _normalize_scheme_for_grouping(sip['scheme_name'])
         key = (base_folio, normalized_scheme)
@@ -2,6 +2,7 @@
 Enhanced JSON storage for MF Central portfolio data
 """
 import json
+import orjson
 from typing import Dict, List, Optional
 from datetime import datetime, date
 import os
@@ -18,6 +19,9 @@ class PortfolioStore:
         self.brokers_file = f"{data_dir}/brokers.json"
         self.aggregation_file = f"{data_dir}/aggregation_map.json"
         
+        # Raw file contents keyed by path -> ((mtime_ns, size), bytes)
+        self._cache = {}
+        
         # Create data directory if it doesn't exist
         os.makedirs(data_dir, exist_ok=True)
     
@@ -27,80 +31,65 @@ class PortfolioStore:
         
         with open(self.portfolio_file, 'w') as f:
             json.dump(portfolio_data, f, indent=2, default=self._json_serializer)
+        self._cache.pop(self.portfolio_file, None)
         
         return "saved"
     
     def get_portfolio(self) -> Optional[Dict]:
         """Get current portfolio"""
-        if not os.path.exists(self.portfolio_file):
-            return None
-        
-        with open(self.portfolio_file, 'r') as f:
-            return json.load(f)
+        return self._load_json(self.portfolio_file, None)
     
     def save_transactions(self, transactions: List[Dict]) -> int:
         """Save all transactions"""
         if transactions:
             with open(self.transactions_file, 'w') as f:
                 json.dump(transactions, f, indent=2, default=self._json_serializer)
+            self._cache.pop(self.transactions_file, None)
             return len(transactions)
         return 0
     
     def get_transactions(self) -> List[Dict]:
         """Get all transactions"""
-        if not os.path.exists(self.transactions_file):
-            return []
-        
-        with open(self.transactions_file, 'r') as f:
-            return json.load(f)
+        return self._load_json(self.transactions_file, [])
     
     def save_sips(self, sips: List[Dict]) -> int:
         """Save active SIP details"""
         if sips:
             with open(self.sips_file, 'w') as f:
                 json.dump(sips, f, indent=2, default=self._json_serializer)
+            self._cache.pop(self.sips_file, None)
             return len(sips)
         return 0
     
     def get_sips(self) -> List[Dict]:
         """Get active SIPs"""
-        if not os.path.exists(self.sips_file):
-            return []
-        
-        with open(self.sips_file, 'r') as f:
-            return json.load(f)
+        return self._load_json(self.sips_file, [])
     
     def save_brokers(self, broker_info: Dict) -> int:
         """Save broker information"""
         if broker_info:
             with open(self.brokers_file, 'w') as f:
                 json.dump(broker_info, f, indent=2, default=self._json_serializer)
+            self._cache.pop(self.brokers_file, None)
             return len(broker_info)
         return 0
     
     def get_brokers(self) -> Dict:
         """Get broker information"""
-        if not os.path.exists(self.brokers_file):
-            return {}
-        
-        with open(self.brokers_file, 'r') as f:
-            return json.load(f)
+        return self._load_json(self.brokers_file, {})
     
     def save_aggregation_map(self, aggregation_map: Dict) -> int:
         """Save fund aggregation mapping"""
         if aggregation_map:
             with open(self.aggregation_file, 'w') as f:
                 json.dump(aggregation_map, f, indent=2, default=self._json_serializer)
+            self._cache.pop(self.aggregation_file, None)
             return len(aggregation_map)
         return 0
     
     def get_aggregation_map(self) -> Dict:
         """Get fund aggregation mapping"""
-        if not os.path.exists(self.aggregation_file):
-            return {}
-        
-        with open(self.aggregation_file, 'r') as f:
-            return json.load(f)
+        return self._load_json(self.aggregation_file, {})
     
     def save_complete_data(
         self,
@@ -153,14 +142,63 @@ class PortfolioStore:
                 if os.path.exists(file_path):
                     os.remove(file_path)
             
+            self._cache.clear()
             return True
         except Exception as e:
             print(f"Error clearing data: {str(e)}")
             return False
     
+    def _load_json(self, file_path: str, default):
+        """
+        Load a JSON file, reusing its contents while the file is unchanged.
+        
+        Pages re-read the store on every request; keying on mtime and size
+        means the disk is only read after a save. Each call parses a fresh
+        copy (with orjson, so it stays cheap), so callers may mutate it.
+        """
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            return default
+        
+        version = (stat.st_mtime_ns, stat.st_size)
+        cached = self._cache.get(file_path)
+        if cached is None or cached[0] != version:
+            with open(file_path, 'rb') as f:
+                cached = (version, f.read())
+            self._cache[file_path] = cached
+        
+        return self._parse_json(cached[1])
+    
+    @staticmethod
+    def _parse_json(raw: bytes):
+        """Parse JSON file contents"""
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            # json.dump writes NaN and Infinity, which orjson rejects
+            return json.loads(raw)
+    
     @staticmethod
     def _json_serializer(obj):
         """Custom JSON serializer for datetime objects"""
         if isinstance(obj, (datetime, date)):
             return obj.isoformat()
         raise TypeError(f"Type {type(obj)} not serializable")
+
+
+# Shared instance for the default data directory
+_default_store = None
+
+
+def get_store() -> PortfolioStore:
+    """
+    Get the shared PortfolioStore for the default data directory.
+    One instance means one parsed-file cache for the app, agents and tracker.
+    """
+    global _default_store
+    
+    if _default_store is None:
+        _default_store = PortfolioStore()
+    
+    return _default_store
@@ -0,0 +1,35 @@
+"""
+Formatting utility tests
+"""
+import unittest
+from utils.formatters import format_currency, format_percentage
+
+
+class TestFormatCurrency(unittest.TestCase):
+
+    def test_small_amounts(self):
+        self.assertEqual(format_currency(None), '₹0')
+        self.assertEqual(format_currency(0), '₹0')
+        self.assertEqual(format_currency(999), '₹999')
+
+    def test_indian_grouping(self):
+        self.assertEqual(format_currency(1000), '₹1,000')
+        self.assertEqual(format_currency(123456), '₹1,23,456')
+        self.assertEqual(format_currency(1234567.89), '₹12,34,567')
+        self.assertEqual(format_currency(10000000), '₹1,00,00,000')
+
+    def test_negative_amounts(self):
+        self.assertEqual(format_currency(-5), '₹-5')
+        self.assertEqual(format_currency(-1234567), '₹-12,34,567')
+
+
+class TestFormatPercentage(unittest.TestCase):
+
+    def test_format_percentage(self):
+        self.assertEqual(format_percentage(None), '0.00%')
+        self.assertEqual(format_percentage(12.345), '12.35%')
+        self.assertEqual(format_percentage(-3), '-3.00%')
+
+
+if __name__ == '__main__':
+    unittest.main()
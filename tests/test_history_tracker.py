@@ -0,0 +1,237 @@
+"""
+History tracker tests (NAV history fetches are stubbed)
+"""
+import os
+import sys
+import time
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import orjson
+import pytest
+
+from utils.history_tracker import HistoryTracker
+
+HISTORY = [
+    {'date': '02-01-2024', 'nav': '12.5'},
+    {'date': '01-01-2024', 'nav': '12.0'},
+]
+
+
+class StubNAVFetcher:
+    """Stands in for enrichment.nav_fetcher.NAVFetcher, recording fetched scheme codes"""
+
+    def __init__(self, histories=None):
+        self.histories = histories or {}
+        self.fetched = []
+
+    def fetch_nav_history(self, scheme_code):
+        self.fetched.append(scheme_code)
+        return self.histories.get(scheme_code, [])
+
+
+@pytest.fixture
+def tracker(tmp_path):
+    return HistoryTracker(
+        history_dir=str(tmp_path / 'history'),
+        nav_cache_dir=str(tmp_path / 'nav_cache'),
+    )
+
+
+@pytest.fixture
+def backfill_fetcher(monkeypatch):
+    """Serve NAV_HISTORY for scheme 100 to backfill_history's NAVFetcher"""
+    class BackfillNAVFetcher(StubNAVFetcher):
+        def __init__(self):
+            super().__init__({'100': NAV_HISTORY})
+    monkeypatch.setitem(sys.modules, 'enrichment.nav_fetcher', SimpleNamespace(NAVFetcher=BackfillNAVFetcher))
+
+
+def days_ago(days):
+    return date.today() - timedelta(days=days)
+
+
+# NAV 10 until 100 days ago, 12 until 20 days ago, then 15
+NAV_HISTORY = [
+    {'date': f"{days_ago(20):%d-%m-%Y}", 'nav': '15.0'},
+    {'date': f"{days_ago(100):%d-%m-%Y}", 'nav': '12.0'},
+    {'date': f"{days_ago(5 * 365):%d-%m-%Y}", 'nav': '10.0'},
+]
+
+HOLDINGS = [
+    {'scheme_name': 'Alpha Fund', 'folio_number': 'F1', 'amfi_code': '100'},
+    {'scheme_name': 'Beta Fund', 'folio_number': 'F3'},  # No scheme code: no NAV, not valued
+]
+
+TRANSACTIONS = [
+    {'scheme_name': 'Alpha Fund', 'folio_number': 'F1', 'type': 'purchase',
+     'date': f"{days_ago(4 * 365):%d-%b-%Y}", 'units': 100, 'amount': 1000},
+    {'scheme_name': 'Alpha Fund', 'folio_number': 'F1', 'type': 'redemption',
+     'date': days_ago(120), 'units': 20, 'amount': 220},
+    {'scheme_name': 'Alpha Fund', 'folio_number': 'F1', 'type': 'sip',
+     'date': f"{days_ago(60):%d-%b-%Y}", 'units': 50, 'amount': 600},
+    {'scheme_name': 'Alpha Fund', 'folio_number': 'F1', 'type': 'dividend',
+     'date': f"{days_ago(50):%d-%b-%Y}", 'units': 0, 'amount': 40},
+    # Same scheme in a folio that isn't held
+    {'scheme_name': 'Alpha Fund', 'folio_number': 'F2', 'type': 'purchase',
+     'date': f"{days_ago(2 * 365):%d-%b-%Y}", 'units': 1000, 'amount': 10000},
+    {'scheme_name': 'Beta Fund', 'folio_number': 'F3', 'type': 'purchase',
+     'date': f"{days_ago(400):%d-%b-%Y}", 'units': 10, 'amount': 100},
+]
+
+
+def snapshot_file(tracker, snapshot_date):
+    return os.path.join(tracker.history_dir, f"{snapshot_date.isoformat()}.json")
+
+
+def set_mtime(path, seconds_ago):
+    mtime_ns = time.time_ns() - seconds_ago * 10**9
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def nav_cache_path(tracker, scheme_code, day=None):
+    return os.path.join(tracker.nav_cache_dir, f"{scheme_code}_{(day or date.today()):%Y%m%d}.json")
+
+
+def test_nav_cache_miss_fetches_and_writes(tracker):
+    fetcher = StubNAVFetcher({'100': HISTORY})
+
+    assert tracker._fetch_nav_history_cached(fetcher, '100') == HISTORY
+    assert fetcher.fetched == ['100']
+    with open(nav_cache_path(tracker, '100'), 'rb') as f:
+        assert orjson.loads(f.read()) == HISTORY
+
+
+def test_nav_cache_hit_skips_fetch(tracker):
+    tracker._fetch_nav_history_cached(StubNAVFetcher({'100': HISTORY}), '100')
+
+    fetcher = StubNAVFetcher()
+    assert tracker._fetch_nav_history_cached(fetcher, '100') == HISTORY
+    assert fetcher.fetched == []
+
+
+@pytest.mark.parametrize('contents', [b'', b'[{"date": "01-01-20'], ids=['empty', 'corrupt'])
+def test_unreadable_nav_cache_is_refetched(tracker, contents):
+    os.makedirs(tracker.nav_cache_dir)
+    with open(nav_cache_path(tracker, '100'), 'wb') as f:
+        f.write(contents)
+    fetcher = StubNAVFetcher({'100': HISTORY})
+
+    assert tracker._fetch_nav_history_cached(fetcher, '100') == HISTORY
+    assert fetcher.fetched == ['100']
+    with open(nav_cache_path(tracker, '100'), 'rb') as f:
+        assert orjson.loads(f.read()) == HISTORY
+
+
+def test_failed_nav_fetch_is_not_cached(tracker):
+    fetcher = StubNAVFetcher()
+
+    assert tracker._fetch_nav_history_cached(fetcher, '100') == []
+    assert tracker._fetch_nav_history_cached(fetcher, '100') == []
+    assert fetcher.fetched == ['100', '100']
+    assert not os.path.exists(nav_cache_path(tracker, '100'))
+
+
+def test_nav_cache_prunes_earlier_days_of_same_scheme(tracker):
+    os.makedirs(tracker.nav_cache_dir)
+    stale = nav_cache_path(tracker, '100', date(2024, 1, 1))
+    other_scheme = nav_cache_path(tracker, '1000', date(2024, 1, 1))
+    for path in (stale, other_scheme):
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(HISTORY))
+
+    tracker._fetch_nav_history_cached(StubNAVFetcher({'100': HISTORY}), '100')
+
+    assert sorted(os.listdir(tracker.nav_cache_dir)) == sorted([
+        os.path.basename(nav_cache_path(tracker, '100')),
+        os.path.basename(other_scheme),
+    ])
+
+
+def test_backfill_history(tracker, backfill_fetcher):
+    tracker.backfill_history(TRANSACTIONS, HOLDINGS)
+
+    totals = {
+        days: (snapshot['total_value'], snapshot['total_invested'], snapshot['total_gain'])
+        for days in [30, 90, 180, 365, 365 * 3]
+        for snapshot in [tracker.get_snapshot(days_ago(days))]
+    }
+    assert totals == {
+        30: (1560.0, 1380, 180.0),  # 130 units at 12
+        90: (960.0, 780, 180.0),    # 80 units at 12
+        180: (1000.0, 1000, 0.0),   # 100 units at 10
+        365: (1000.0, 1000, 0.0),
+        365 * 3: (1000.0, 1000, 0.0),
+    }
+    assert tracker.get_snapshot(days_ago(30))['date'] == days_ago(30).isoformat()
+
+
+def test_backfill_keeps_existing_snapshots(tracker, backfill_fetcher):
+    tracker.save_snapshot_data(days_ago(90), {'date': days_ago(90).isoformat(), 'total_value': 1})
+
+    tracker.backfill_history(TRANSACTIONS, HOLDINGS)
+
+    assert tracker.get_snapshot(days_ago(90))['total_value'] == 1
+    assert tracker.get_snapshot(days_ago(30))['total_value'] == 1560.0
+
+
+def test_backfill_skips_dates_without_value(tracker, backfill_fetcher):
+    tracker.backfill_history(TRANSACTIONS, HOLDINGS[1:])
+
+    assert tracker.get_timeline_data(days=365 * 3) == []
+
+
+def test_timeline_window(tracker):
+    for days in [400, 365, 10, 0, -1]:
+        tracker.save_snapshot_data(days_ago(days), {'date': days_ago(days).isoformat()})
+    with open(os.path.join(tracker.history_dir, 'notes.json'), 'w') as f:
+        f.write('{}')
+    with open(os.path.join(tracker.history_dir, f"{days_ago(5).isoformat()}.tmp"), 'w') as f:
+        f.write('{}')
+
+    assert [s['date'] for s in tracker.get_timeline_data(days=365)] == [
+        days_ago(365).isoformat(), days_ago(10).isoformat(), date.today().isoformat()
+    ]
+    assert [s['date'] for s in tracker.get_timeline_data(days=30)] == [
+        days_ago(10).isoformat(), date.today().isoformat()
+    ]
+
+
+def test_save_then_read_sees_new_snapshot(tracker):
+    tracker.save_snapshot_data(days_ago(10), {'date': days_ago(10).isoformat(), 'total_value': 1})
+    assert len(tracker.get_timeline_data(days=30)) == 1
+
+    tracker.save_snapshot_data(days_ago(5), {'date': days_ago(5).isoformat(), 'total_value': 2})
+    tracker.save_snapshot_data(days_ago(10), {'date': days_ago(10).isoformat(), 'total_value': 3})
+
+    assert [s['total_value'] for s in tracker.get_timeline_data(days=30)] == [3, 2]
+
+
+def test_reads_snapshots_written_by_another_tracker(tracker):
+    writer = HistoryTracker(history_dir=tracker.history_dir, nav_cache_dir=tracker.nav_cache_dir)
+    writer.save_snapshot_data(days_ago(10), {'date': days_ago(10).isoformat(), 'total_value': 1})
+    # Old timestamps, so the writes below change them even on coarse-grained filesystems
+    set_mtime(snapshot_file(tracker, days_ago(10)), seconds_ago=60)
+    set_mtime(tracker.history_dir, seconds_ago=60)
+    assert [s['total_value'] for s in tracker.get_timeline_data(days=30)] == [1]
+
+    # Written without clearing the shared snapshot cache, as another process would
+    with open(snapshot_file(tracker, days_ago(10)), 'wb') as f:
+        f.write(orjson.dumps({'date': days_ago(10).isoformat(), 'total_value': 1000}))
+    with open(snapshot_file(tracker, days_ago(5)), 'wb') as f:
+        f.write(orjson.dumps({'date': days_ago(5).isoformat(), 'total_value': 2}))
+
+    assert [s['total_value'] for s in tracker.get_timeline_data(days=30)] == [1000, 2]
+
+
+def test_rewrite_with_same_mtime_is_reread(tracker):
+    path = snapshot_file(tracker, days_ago(10))
+    tracker.save_snapshot_data(days_ago(10), {'date': days_ago(10).isoformat(), 'total_value': 1})
+    set_mtime(path, seconds_ago=60)
+    assert tracker.get_snapshot(days_ago(10))['total_value'] == 1
+
+    with open(path, 'wb') as f:
+        f.write(orjson.dumps({'date': days_ago(10).isoformat(), 'total_value': 1000}))
+    set_mtime(path, seconds_ago=60)
+
+    assert tracker.get_snapshot(days_ago(10))['total_value'] == 1000
@@ -0,0 +1,80 @@
+"""
+JSON store tests
+"""
+import json
+import math
+import os
+
+import pytest
+
+from database.json_store import PortfolioStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PortfolioStore(data_dir=str(tmp_path))
+
+
+def test_missing_files_return_defaults(store):
+    assert store.get_portfolio() is None
+    assert store.get_transactions() == []
+    assert store.get_sips() == []
+    assert store.get_brokers() == {}
+    assert store.get_aggregation_map() == {}
+
+
+def test_callers_can_mutate_returned_data(store):
+    store.save_portfolio({'total_value': 100, 'holdings': [{'scheme_name': 'Alpha Fund'}]})
+    store.save_sips([{'scheme_name': 'Alpha Fund', 'amount': 500}])
+
+    portfolio = store.get_portfolio()
+    portfolio['holdings'][0]['scheme_name'] = 'changed'
+    portfolio['total_value'] = 0
+    store.get_sips()[0]['amount'] = 0
+
+    assert store.get_portfolio()['holdings'][0]['scheme_name'] == 'Alpha Fund'
+    assert store.get_portfolio()['total_value'] == 100
+    assert store.get_sips()[0]['amount'] == 500
+
+
+def test_save_invalidates_cache(store):
+    store.save_transactions([{'units': 1}])
+    assert store.get_transactions() == [{'units': 1}]
+    stat = os.stat(store.transactions_file)
+
+    store.save_transactions([{'units': 2}])
+    # Same mtime and size as the first file: only the save itself can invalidate
+    os.utime(store.transactions_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert store.get_transactions() == [{'units': 2}]
+
+
+def test_clear_all_data(store):
+    store.save_brokers({'broker': 'direct'})
+    assert store.get_brokers() == {'broker': 'direct'}
+
+    assert store.clear_all_data()
+
+    assert store.get_brokers() == {}
+    assert store.get_complete_data()['portfolio'] is None
+
+
+def test_rewrite_with_same_mtime_and_other_size_is_reread(store):
+    store.save_aggregation_map({'Alpha Fund': ['F1']})
+    assert store.get_aggregation_map() == {'Alpha Fund': ['F1']}
+    stat = os.stat(store.aggregation_file)
+
+    # Written by another process, with the old mtime
+    with open(store.aggregation_file, 'w') as f:
+        json.dump({'Alpha Fund': ['F1', 'F2']}, f)
+    os.utime(store.aggregation_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert store.get_aggregation_map() == {'Alpha Fund': ['F1', 'F2']}
+
+
+def test_reads_non_finite_numbers(store):
+    store.save_portfolio({'xirr': float('nan'), 'total_value': float('inf')})
+
+    portfolio = store.get_portfolio()
+    assert math.isnan(portfolio['xirr'])
+    assert portfolio['total_value'] == math.inf
@@ -0,0 +1,47 @@
+"""
+Buffered log handler tests
+"""
+import logging
+import time
+
+from utils.logger import BufferedFileHandler
+
+
+def _log(handler, level, message):
+    handler.handle(logging.LogRecord('test', level, __file__, 0, message, None, None))
+
+
+def test_idle_handler_flushes_within_interval(tmp_path):
+    log_file = tmp_path / 'app.log'
+    handler = BufferedFileHandler(log_file, flush_interval=0.1)
+    try:
+        _log(handler, logging.INFO, 'buffered line')
+        assert log_file.read_text() == ''
+        
+        # No further records: the background flush alone must write it out
+        deadline = time.monotonic() + 2
+        while 'buffered line' not in log_file.read_text() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert 'buffered line' in log_file.read_text()
+    finally:
+        handler.close()
+
+
+def test_warnings_flush_immediately(tmp_path):
+    log_file = tmp_path / 'app.log'
+    handler = BufferedFileHandler(log_file, flush_interval=60)
+    try:
+        _log(handler, logging.INFO, 'info line')
+        _log(handler, logging.WARNING, 'warning line')
+        assert log_file.read_text() == 'info line\nwarning line\n'
+    finally:
+        handler.close()
+
+
+def test_close_flushes_and_stops_thread(tmp_path):
+    log_file = tmp_path / 'app.log'
+    handler = BufferedFileHandler(log_file, flush_interval=60)
+    _log(handler, logging.INFO, 'last line')
+    handler.close()
+    assert log_file.read_text() == 'last line\n'
+    assert handler._stop_flushing.is_set()
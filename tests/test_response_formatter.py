@@ -0,0 +1,53 @@
+"""
+Response formatter tests
+"""
+import unittest
+from utils.response_formatter import format_response
+
+
+class TestFormatResponse(unittest.TestCase):
+
+    def test_currency_and_percentages(self):
+        formatted = format_response("Invested Rs. 5000 and INR 200, returns 12 %")
+        self.assertIn('₹5000', formatted)
+        self.assertIn('₹200', formatted)
+        self.assertIn('12%', formatted)
+
+    def test_fund_names(self):
+        formatted = format_response("hdfc flexi cap and aditya birla sun life")
+        self.assertIn('HDFC flexi cap', formatted)
+        self.assertIn('Aditya Birla sun life', formatted)
+
+    def test_emoji_sections(self):
+        formatted = format_response("**Total Value**: 100\n**Recommendation**: hold")
+        self.assertTrue(formatted.startswith('💰 **Total Value**'))
+        self.assertIn('---\n\n💡 **Recommendation**', formatted)
+
+    def test_emoji_section_labels(self):
+        formatted = format_response("**Returns (1Y)**: 12\n**Warning**: high\n**Taxes** due")
+        self.assertIn('📈 **Return (1Y)**', formatted)
+        self.assertIn('⚠️ **Warning**', formatted)
+        self.assertIn('💼 **Taxes**', formatted)
+
+    def test_table_spacing(self):
+        formatted = format_response("Holdings:\n| Fund | Value |\n|---|---|\nDone")
+        self.assertTrue(formatted.endswith('Holdings:\n\n| Fund | Value |\n|---|---|\nDone'))
+
+    def test_table_spacing_between_tables(self):
+        formatted = format_response("| A |\nafter\n| B |\n\n| C |\nend\nmore")
+        self.assertTrue(formatted.endswith('| A |\nafter\n\n| B |\n\n| C |\nend\n\nmore'))
+
+    def test_default_header(self):
+        self.assertEqual(format_response("plain text"), '📊 **Analysis**\n\nplain text')
+
+    def test_already_formatted_only_cleaned(self):
+        formatted = format_response("📈 **Summary**\n\n\n\nhdfc fund.Done  ")
+        self.assertEqual(formatted, '📈 **Summary**\n\nhdfc fund. Done')
+
+    def test_already_formatted_with_rupees_fully_formatted(self):
+        formatted = format_response("📈 **Summary**: Rs. 500 in hdfc")
+        self.assertIn('₹500 in HDFC', formatted)
+
+
+if __name__ == '__main__':
+    unittest.main()
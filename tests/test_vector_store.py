@@ -0,0 +1,274 @@
+"""
+Vector store tests (OpenAI embeddings are stubbed; FAISS and SQLite are real)
+"""
+import hashlib
+import os
+import pickle
+from types import SimpleNamespace
+
+import faiss
+import numpy as np
+import pytest
+
+import config
+from vector_db import faiss_store
+from vector_db.faiss_store import LocalVectorStore
+
+DIMENSION = 512
+
+
+def fake_embedding(text, dimension=DIMENSION):
+    """Deterministic pseudo-random embedding for a text"""
+    seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:4], 'little')
+    return np.random.default_rng(seed).standard_normal(dimension).astype(np.float32)
+
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, model, input, dimensions=DIMENSION):
+        self.calls += 1
+        return SimpleNamespace(data=[
+            SimpleNamespace(embedding=fake_embedding(text, dimensions).tolist()) for text in input
+        ])
+
+
+class FakeOpenAI:
+    def __init__(self, api_key=None):
+        self.embeddings = FakeEmbeddings()
+
+
+@pytest.fixture
+def open_store(tmp_path, monkeypatch):
+    """Factory for stores over tmp_path with stubbed OpenAI embeddings"""
+    monkeypatch.setattr(faiss_store, 'OpenAI', FakeOpenAI)
+    monkeypatch.setattr(config, 'EMBEDDING_DIMENSION', DIMENSION)
+
+    def open_store(read_only=False):
+        return LocalVectorStore(store_path=str(tmp_path), read_only=read_only)
+    return open_store
+
+
+def write_legacy_store(path, texts, dimension=DIMENSION):
+    """Write a store in the original format: unnormalized IndexFlatL2 + metadata.pkl"""
+    index = faiss.IndexFlatL2(dimension)
+    index.add(np.stack([fake_embedding(t, dimension) * 3 for t in texts]))
+    faiss.write_index(index, f"{path}/faiss.index")
+    with open(f"{path}/metadata.pkl", 'wb') as f:
+        pickle.dump([{'name': t.split()[0]} for t in texts], f)
+
+
+def count_rows(connection, table):
+    return connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_search_returns_closest_text(open_store):
+    store = open_store()
+    store.replace_all(['alpha fund', 'beta fund'], [{'name': 'alpha'}, {'name': 'beta'}])
+    results = store.search('beta fund', k=2)
+    assert [r['metadata']['name'] for r in results] == ['beta', 'alpha']
+    assert results[0]['score'] > 0.95
+
+
+def test_reindex_reloads_read_only_store(open_store):
+    open_store().replace_all(['alpha fund', 'beta fund'], [{'name': 'alpha'}, {'name': 'beta'}])
+    reader = open_store(read_only=True)
+    assert reader.search('alpha fund', k=1)[0]['metadata'] == {'name': 'alpha'}
+
+    # Rows are renumbered: id 0 now belongs to gamma
+    open_store().replace_all(['gamma fund', 'alpha fund'], [{'name': 'gamma'}, {'name': 'alpha'}])
+    assert reader.search('alpha fund', k=1)[0]['metadata'] == {'name': 'alpha'}
+    assert reader.search('gamma fund', k=1)[0]['metadata'] == {'name': 'gamma'}
+
+
+def test_read_only_store_does_not_write(open_store, tmp_path):
+    reader = open_store(read_only=True)
+    assert reader.search('anything') == []
+    assert os.listdir(tmp_path) == []
+    with pytest.raises(RuntimeError):
+        reader.add_texts(['x'], [{}])
+
+
+def test_replace_all_empty(open_store):
+    store = open_store()
+    store.replace_all(['alpha fund'], [{'name': 'alpha'}])
+    store.replace_all([], [])
+
+    assert store.index.ntotal == 0
+    assert store.search('alpha fund') == []
+    assert count_rows(store.db, 'metadata') == 0
+    assert count_rows(store.emb_cache, 'cache') == 0
+    assert open_store(read_only=True).index.ntotal == 0
+
+
+def test_replace_all_reuses_cached_embeddings(open_store):
+    store = open_store()
+    store.replace_all(['alpha fund', 'beta fund'], [{}, {}])
+    store.replace_all(['alpha fund', 'gamma fund'], [{}, {}])
+
+    assert store.client.embeddings.calls == 2
+    assert count_rows(store.emb_cache, 'cache') == 2  # beta was pruned
+
+
+def test_add_texts_appends_without_reencoding(open_store):
+    store = open_store()
+    store.add_texts(['alpha fund', 'beta fund'], [{'name': 'alpha'}, {'name': 'beta'}])
+    codes = faiss.vector_to_array(store.index.codes).copy()
+    store.add_texts(['gamma fund'], [{'name': 'gamma'}])
+
+    assert (faiss.vector_to_array(store.index.codes)[:len(codes)] == codes).all()
+    assert open_store().search('gamma fund', k=1)[0]['metadata'] == {'name': 'gamma'}
+
+
+def test_hnsw_above_threshold(open_store):
+    texts = [f"fund {i}" for i in range(LocalVectorStore.HNSW_THRESHOLD + 1)]
+    open_store().replace_all(texts, [{'i': i} for i in range(len(texts))])
+
+    reader = open_store(read_only=True)
+    assert isinstance(reader.index, faiss.IndexHNSW)
+    assert reader.search('fund 17', k=1)[0]['metadata'] == {'i': 17}
+
+
+def test_legacy_store_migration(open_store, tmp_path, capsys):
+    write_legacy_store(tmp_path, ['alpha fund', 'beta fund'])
+
+    # A reader serves the legacy store from memory without migrating it
+    reader = open_store(read_only=True)
+    assert reader.search('beta fund', k=1)[0]['metadata'] == {'name': 'beta'}
+    assert sorted(os.listdir(tmp_path)) == ['faiss.index', 'metadata.pkl']
+    output = capsys.readouterr().out
+    assert 'Migrated' not in output
+    assert 'migration deferred' in output
+
+    store = open_store()
+    assert 'Migrated FAISS index' in capsys.readouterr().out
+    assert not os.path.exists(tmp_path / 'metadata.pkl')
+    assert store._index_type() == LocalVectorStore.FLAT_INDEX
+    assert open_store().search('beta fund', k=1)[0]['metadata'] == {'name': 'beta'}
+    assert reader.search('alpha fund', k=1)[0]['metadata'] == {'name': 'alpha'}
+
+
+def test_rejects_index_with_other_dimension(open_store, tmp_path):
+    write_legacy_store(tmp_path, ['alpha fund'], dimension=1536)
+
+    reader = open_store(read_only=True)
+    assert reader.index.ntotal == 0
+    assert os.path.exists(tmp_path / 'metadata.pkl')
+
+    store = open_store()
+    assert store.index.d == DIMENSION
+    assert store.index.ntotal == 0
+    assert not os.path.exists(tmp_path / 'metadata.pkl')
+    assert open_store().index.d == DIMENSION
+
+
+def test_save_leaves_no_temporary_files(open_store, tmp_path):
+    open_store().replace_all(['alpha fund'], [{}])
+    assert not [f for f in os.listdir(tmp_path) if f.endswith('.tmp')]
+
+
+def fail_on_call(monkeypatch, module, name, call_number=1):
+    """Make module.name raise OSError on its call_number-th call"""
+    original = getattr(module, name)
+    calls = []
+
+    def failing(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == call_number:
+            raise OSError(f"simulated {name} failure")
+        return original(*args, **kwargs)
+    monkeypatch.setattr(module, name, failing)
+
+
+def test_write_failing_before_commit_keeps_old_store(open_store, tmp_path, monkeypatch):
+    store = open_store()
+    store.replace_all(['alpha fund'], [{'name': 'alpha'}])
+    reader = open_store(read_only=True)
+
+    with monkeypatch.context() as patch, pytest.raises(OSError):
+        fail_on_call(patch, faiss, 'write_index')
+        store.replace_all(['beta fund'], [{'name': 'beta'}])
+
+    assert not [f for f in os.listdir(tmp_path) if f.endswith('.tmp')]
+    assert store.search('alpha fund', k=1)[0]['metadata'] == {'name': 'alpha'}
+    assert reader.search('alpha fund', k=1)[0]['metadata'] == {'name': 'alpha'}
+
+
+def test_add_failing_before_commit_drops_added_vectors(open_store, monkeypatch):
+    store = open_store()
+    store.add_texts(['alpha fund'], [{'name': 'alpha'}])
+
+    with monkeypatch.context() as patch, pytest.raises(OSError):
+        fail_on_call(patch, faiss, 'write_index')
+        store.add_texts(['beta fund'], [{'name': 'beta'}])
+
+    assert store.index.ntotal == 1
+    store.add_texts(['gamma fund'], [{'name': 'gamma'}])
+    assert store.search('gamma fund', k=1)[0]['metadata'] == {'name': 'gamma'}
+
+
+def test_write_failing_after_commit_is_recovered(open_store, tmp_path, monkeypatch):
+    open_store().replace_all(['alpha fund', 'beta fund'], [{'name': 'alpha'}, {'name': 'beta'}])
+    reader = open_store(read_only=True)
+    store = open_store()
+
+    # The metadata is committed, then renaming the new index into place fails
+    with monkeypatch.context() as patch, pytest.raises(OSError):
+        fail_on_call(patch, os, 'replace')
+        store.replace_all(['gamma fund', 'alpha fund'], [{'name': 'gamma'}, {'name': 'alpha'}])
+
+    # Readers use the staged index until a writer renames it into place
+    assert reader.search('gamma fund', k=1)[0]['metadata'] == {'name': 'gamma'}
+    assert open_store(read_only=True).search('alpha fund', k=1)[0]['metadata'] == {'name': 'alpha'}
+    assert os.path.exists(tmp_path / 'faiss.index.tmp')
+
+    store = open_store()
+    assert not [f for f in os.listdir(tmp_path) if f.endswith('.tmp')]
+    store.add_texts(['delta fund'], [{'name': 'delta'}])
+    assert store.search('delta fund', k=1)[0]['metadata'] == {'name': 'delta'}
+    assert store.search('gamma fund', k=1)[0]['metadata'] == {'name': 'gamma'}
+
+
+def test_write_failing_between_renames_is_recovered(open_store, tmp_path, monkeypatch):
+    open_store().replace_all(['alpha fund'], [{'name': 'alpha'}])
+    store = open_store()
+
+    with monkeypatch.context() as patch, pytest.raises(OSError):
+        fail_on_call(patch, os, 'replace', call_number=2)
+        store.replace_all(['beta fund'], [{'name': 'beta'}])
+
+    assert open_store(read_only=True).search('beta fund', k=1)[0]['metadata'] == {'name': 'beta'}
+    store = open_store()
+    assert not [f for f in os.listdir(tmp_path) if f.endswith('.tmp')]
+    assert store.generation == store._db_generation()
+    assert store.search('beta fund', k=1)[0]['metadata'] == {'name': 'beta'}
+
+
+def test_mismatched_store_is_reset(open_store, tmp_path):
+    # A store left behind by a write that crashed before writes were staged:
+    # metadata.db is one generation ahead of the index
+    store = open_store()
+    store.replace_all(['alpha fund'], [{'name': 'alpha'}])
+    with store.db:
+        store.db.execute("DELETE FROM metadata")
+        store.db.execute(f"PRAGMA user_version = {store.generation + 1}")
+
+    store = open_store()
+    assert store.index.ntotal == 0
+    assert store.generation == store._db_generation()
+    store.add_texts(['beta fund'], [{'name': 'beta'}])
+    assert store.search('beta fund', k=1)[0]['metadata'] == {'name': 'beta'}
+
+
+@pytest.mark.parametrize('env, expected', [({}, [os.cpu_count() or 1]), ({'OMP_NUM_THREADS': '2'}, [])])
+def test_thread_count_respects_omp_num_threads(open_store, monkeypatch, env, expected):
+    monkeypatch.delenv('OMP_NUM_THREADS', raising=False)
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    calls = []
+    monkeypatch.setattr(faiss, 'omp_set_num_threads', calls.append)
+
+    open_store()
+
+    assert calls == expected
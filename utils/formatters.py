@@ -1,6 +1,33 @@
 """
 Formatting utilities for the application.
 """
+from functools import lru_cache
+
+# Bound format method, resolved once instead of per call
+_PERCENT_FORMAT = "{:.2f}%".format
+
+
+@lru_cache(maxsize=4096)
+def _group_indian(n: int) -> str:
+    """
+    Insert Indian digit-group commas into a non-negative integer.
+    Uses integer arithmetic instead of repeated string slicing; memoized
+    since SIP amounts and installments repeat heavily across rows.
+    Example: 1234567 -> 12,34,567
+    """
+    if n < 1000:
+        return str(n)
+    
+    # Last 3 digits, then groups of 2 from the right
+    n, last_three = divmod(n, 1000)
+    groups = [f"{last_three:03d}"]
+    while n >= 100:
+        n, pair = divmod(n, 100)
+        groups.append(f"{pair:02d}")
+    groups.append(str(n))
+    
+    return ",".join(reversed(groups))
+
 
 def format_currency(amount: float) -> str:
     """
@@ -9,38 +36,22 @@ def format_currency(amount: float) -> str:
     """
     if amount is None:
         return "₹0"
-        
-    # Convert to string and split integer/decimal
-    s = f"{int(amount)}"
     
-    # Handle negative numbers
-    is_negative = False
-    if s.startswith('-'):
-        is_negative = True
-        s = s[1:]
+    n = int(amount)
+    if n < 0:
+        return f"₹-{_group_indian(-n)}"
     
-    # Format integer part
-    if len(s) <= 3:
-        formatted = s
-    else:
-        # Last 3 digits
-        last_three = s[-3:]
-        # Remaining digits
-        remaining = s[:-3]
-        # Add commas every 2 digits from right
-        formatted_remaining = ""
-        while len(remaining) > 2:
-            formatted_remaining = "," + remaining[-2:] + formatted_remaining
-            remaining = remaining[:-2]
-        formatted_remaining = remaining + formatted_remaining
-        
-        formatted = formatted_remaining + "," + last_three
-        
-    # Add negative sign if needed
-    if is_negative:
-        formatted = "-" + formatted
-        
-    return f"₹{formatted}"
+    return f"₹{_group_indian(n)}"
+
+def format_percentage(value: float) -> str:
+    """
+    Format value as a percentage with two decimals.
+    Example: 12.345 -> 12.35%
+    """
+    if value is None:
+        return "0.00%"
+    
+    return _PERCENT_FORMAT(value)
 
 def format_lakhs_crores(amount: float) -> str:
     """
@@ -2,17 +2,23 @@
 Historical Portfolio Tracker
 Stores daily snapshots for timeline analysis
 """
-import json
 import os
+import orjson
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date
-from typing import Dict, List, Optional
-from database.json_store import PortfolioStore
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from database.json_store import get_store
 
 class HistoryTracker:
-    def __init__(self, history_dir='./data/portfolio_history'):
+    def __init__(self, history_dir='./data/portfolio_history', nav_cache_dir='./data/nav_cache'):
         self.history_dir = history_dir
+        self.nav_cache_dir = nav_cache_dir
         os.makedirs(history_dir, exist_ok=True)
-        self.store = PortfolioStore()
+        self.store = get_store()
+        self._snapshot_dates = None
     
     def save_snapshot(self, custom_date: Optional[date] = None):
         """Save current portfolio as historical snapshot"""
@@ -36,8 +42,10 @@ class HistoryTracker:
             'num_funds': len(portfolio.get('holdings', []))
         }
         
-        with open(filename, 'w') as f:
-            json.dump(snapshot, f, indent=2)
+        with open(filename, 'wb') as f:
+            f.write(orjson.dumps(snapshot, option=orjson.OPT_SERIALIZE_NUMPY))
+        self._load_snapshot.cache_clear()
+        self._snapshot_dates = None
         
         print(f"✓ Saved snapshot for {snapshot_date}")
         return snapshot
@@ -46,22 +54,58 @@ class HistoryTracker:
         """Load specific snapshot"""
         filename = f"{self.history_dir}/{snapshot_date.isoformat()}.json"
         
-        if not os.path.exists(filename):
+        try:
+            stat = os.stat(filename)
+        except FileNotFoundError:
             return None
         
-        with open(filename, 'r') as f:
-            return json.load(f)
+        return self._load_snapshot(filename, stat.st_mtime_ns, stat.st_size)
+    
+    @staticmethod
+    @lru_cache(maxsize=2048)
+    def _load_snapshot(filename: str, mtime_ns: int, size: int) -> Dict:
+        """
+        Parse a snapshot file. Keyed on its mtime and size, so a snapshot
+        rewritten by another tracker or process is read again.
+        """
+        with open(filename, 'rb') as f:
+            return orjson.loads(f.read())
+    
+    def _list_snapshot_dates(self) -> List[date]:
+        """
+        Sorted dates of snapshots on disk, from a single directory read.
+        Cached on the instance until a snapshot is written or the directory
+        changes (another tracker or process added or removed a snapshot).
+        """
+        mtime_ns = os.stat(self.history_dir).st_mtime_ns
+        if self._snapshot_dates is None or self._snapshot_dates[0] != mtime_ns:
+            snapshot_dates = []
+            with os.scandir(self.history_dir) as entries:
+                for entry in entries:
+                    if not entry.name.endswith('.json'):
+                        continue
+                    try:
+                        snapshot_dates.append(date.fromisoformat(entry.name[:-5]))
+                    except ValueError:
+                        continue
+            self._snapshot_dates = (mtime_ns, sorted(snapshot_dates))
+        
+        return self._snapshot_dates[1]
     
     def get_timeline_data(self, days: int = 365) -> List[Dict]:
         """Get timeline data for charts"""
         from datetime import timedelta
         
-        timeline = []
-        current_date = date.today()
+        today = date.today()
+        cutoff = today - timedelta(days=days)
+        
+        # Snapshot dates are sorted, so the window is a contiguous slice
+        snapshot_dates = self._list_snapshot_dates()
+        window = snapshot_dates[bisect_left(snapshot_dates, cutoff):bisect_right(snapshot_dates, today)]
         
-        for i in range(days, -1, -1):
-            check_date = current_date - timedelta(days=i)
-            snapshot = self.get_snapshot(check_date)
+        timeline = []
+        for snapshot_date in window:
+            snapshot = self.get_snapshot(snapshot_date)
             
             if snapshot:
                 timeline.append(snapshot)
@@ -83,13 +127,38 @@ class HistoryTracker:
         target_periods = [30, 90, 180, 365, 365*3]
         target_dates = [date.today() - timedelta(days=d) for d in target_periods]
         
-        # Cache NAV history for all schemes
+        # Fetch NAV history for all schemes in parallel (network-bound)
+        scheme_codes = list({h['amfi_code'] for h in holdings if h.get('amfi_code')})
         nav_history_cache = {}
-        for holding in holdings:
-            scheme_code = holding.get('amfi_code')
-            if scheme_code and scheme_code not in nav_history_cache:
-                nav_history_cache[scheme_code] = fetcher.fetch_nav_history(scheme_code)
-                print(f"   Fetched history for {holding['scheme_name'][:30]}...")
+        if scheme_codes:
+            with ThreadPoolExecutor(max_workers=min(16, len(scheme_codes))) as executor:
+                histories = executor.map(
+                    lambda code: self._fetch_nav_history_cached(fetcher, code), scheme_codes
+                )
+                for scheme_code, history in zip(scheme_codes, histories):
+                    nav_history_cache[scheme_code] = self._index_nav_history(history)
+            print(f"   Fetched history for {len(scheme_codes)} schemes")
+        
+        # Parse each transaction once, indexed by (scheme, folio):
+        # (date, signed units, signed amount)
+        txns_by_holding = defaultdict(list)
+        for txn in transactions:
+            if txn['type'] in ['purchase', 'sip']:
+                sign = 1
+            elif txn['type'] == 'redemption':
+                sign = -1
+            else:
+                continue
+            
+            txn_date = txn['date']
+            if isinstance(txn_date, str):
+                txn_date = datetime.strptime(txn_date, '%d-%b-%Y').date()
+            
+            txns_by_holding[(txn.get('scheme_name'), txn.get('folio_number'))].append((
+                txn_date,
+                sign * txn['units'],
+                sign * txn['amount']  # Simplified for redemptions
+            ))
         
         # Process each target date
         for target_date in target_dates:
@@ -110,38 +179,21 @@ class HistoryTracker:
                 units = 0
                 invested = 0
                 
-                # Filter transactions up to target_date
-                relevant_txns = [
-                    t for t in transactions 
-                    if t.get('scheme_name') == scheme_name 
-                    and t.get('folio_number') == folio
-                ]
-                
-                for txn in relevant_txns:
-                    txn_date = txn['date']
-                    if isinstance(txn_date, str):
-                        txn_date = datetime.strptime(txn_date, '%d-%b-%Y').date()
-                    
+                # Sum transactions up to target_date
+                for txn_date, txn_units, txn_amount in txns_by_holding.get((scheme_name, folio), ()):
                     if txn_date <= target_date:
-                        if txn['type'] in ['purchase', 'sip']:
-                            units += txn['units']
-                            invested += txn['amount']
-                        elif txn['type'] == 'redemption':
-                            units -= txn['units']
-                            invested -= txn['amount'] # Simplified
+                        units += txn_units
+                        invested += txn_amount
                 
                 if units > 0.01: # If held units
                     # 2. Find NAV on target_date
                     nav = 0
                     if scheme_code in nav_history_cache:
-                        history = nav_history_cache[scheme_code]
-                        # Find closest NAV <= target_date
-                        # History is usually sorted desc (newest first)
-                        for entry in history:
-                            nav_date = datetime.strptime(entry['date'], '%d-%m-%Y').date()
-                            if nav_date <= target_date:
-                                nav = float(entry['nav'])
-                                break
+                        nav_dates, navs = nav_history_cache[scheme_code]
+                        # Binary search for the closest NAV <= target_date
+                        pos = bisect_right(nav_dates, target_date) - 1
+                        if pos >= 0:
+                            nav = navs[pos]
                     
                     if nav > 0:
                         total_value += units * nav
@@ -160,11 +212,60 @@ class HistoryTracker:
                 })
                 print(f"✓ Backfilled snapshot for {target_date}: ₹{total_value:,.0f}")
 
+    def _fetch_nav_history_cached(self, fetcher, scheme_code: str) -> List[Dict]:
+        """
+        Fetch NAV history, reusing today's on-disk copy when one exists.
+        """
+        cache_path = f"{self.nav_cache_dir}/{scheme_code}_{date.today():%Y%m%d}.json"
+        
+        if os.path.exists(cache_path):
+            try:
+                with open(cache_path, 'rb') as f:
+                    return orjson.loads(f.read())
+            except (OSError, ValueError):
+                pass  # Corrupt cache entry, refetch below
+        
+        history = fetcher.fetch_nav_history(scheme_code)
+        
+        # Only cache successful fetches so failures are retried next time
+        if history:
+            os.makedirs(self.nav_cache_dir, exist_ok=True)
+            with open(cache_path, 'wb') as f:
+                f.write(orjson.dumps(history))
+            self._prune_nav_cache(scheme_code, cache_path)
+        
+        return history
+
+    def _prune_nav_cache(self, scheme_code: str, keep_path: str):
+        """Remove a scheme's cached NAV history from earlier days"""
+        prefix = f"{scheme_code}_"
+        keep = os.path.basename(keep_path)
+        with os.scandir(self.nav_cache_dir) as entries:
+            for entry in entries:
+                if entry.name.startswith(prefix) and entry.name != keep:
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass  # Already removed by a concurrent fetch
+
+    @staticmethod
+    def _index_nav_history(history: List[Dict]) -> Tuple[List[date], List[float]]:
+        """
+        Parse NAV history once into ascending (dates, navs) lists for bisect lookups.
+        """
+        points = sorted(
+            (datetime.strptime(entry['date'], '%d-%m-%Y').date(), float(entry['nav']))
+            for entry in history
+        )
+        return [d for d, _ in points], [nav for _, nav in points]
+
     def save_snapshot_data(self, snapshot_date: date, data: Dict):
         """Internal method to save snapshot data directly"""
         filename = f"{self.history_dir}/{snapshot_date.isoformat()}.json"
-        with open(filename, 'w') as f:
-            json.dump(data, f, indent=2)
+        with open(filename, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY))
+        self._load_snapshot.cache_clear()
+        self._snapshot_dates = None
 
     def calculate_period_return(self, days: int) -> Optional[float]:
         """Calculate return for specific period (e.g., 30, 90, 180, 365 days)"""
@@ -2,8 +2,10 @@
 Centralized Logger Configuration
 Single logging setup for entire codebase
 """
+import atexit
 import logging
 import sys
+import threading
 from pathlib import Path
 
 # Create logs directory
@@ -14,6 +16,52 @@ LOGS_DIR.mkdir(exist_ok=True)
 _logging_configured = False
 
 
+class BufferedFileHandler(logging.FileHandler):
+    """
+    FileHandler that writes through a 1 MiB buffer instead of flushing
+    (one write() syscall) after every record. WARNING and above are flushed
+    immediately; everything else by a background thread every
+    flush_interval seconds, on buffer fill, at exit, or on close.
+    """
+    buffer_size = 1 << 20
+    
+    def __init__(self, filename, mode='a', encoding=None, delay=False, errors=None, flush_interval=5.0):
+        super().__init__(filename, mode, encoding, delay, errors)
+        self.flush_interval = flush_interval
+        self._stop_flushing = threading.Event()
+        threading.Thread(target=self._flush_periodically, name='log-flush', daemon=True).start()
+    
+    def _open(self):
+        return open(self.baseFilename, self.mode, buffering=self.buffer_size,
+                    encoding=self.encoding, errors=self.errors)
+    
+    def emit(self, record):
+        super().emit(record)
+        if record.levelno >= logging.WARNING:
+            self.flush_buffer()
+    
+    def _flush_periodically(self):
+        """Bound how long records sit in the buffer, even when nothing else is logged"""
+        while not self._stop_flushing.wait(self.flush_interval):
+            self.flush_buffer()
+    
+    def flush(self):
+        """Skip StreamHandler's per-record flush; see flush_buffer"""
+    
+    def flush_buffer(self):
+        """Write buffered records to the log file"""
+        self.acquire()
+        try:
+            if self.stream and not self.stream.closed:
+                self.stream.flush()
+        finally:
+            self.release()
+    
+    def close(self):
+        self._stop_flushing.set()
+        super().close()
+
+
 def setup_logging(log_level=logging.INFO, log_file="app.log"):
     """
     Setup centralized logging configuration for entire application
@@ -34,6 +82,9 @@ def setup_logging(log_level=logging.INFO, log_file="app.log"):
     logging.getLogger('google').setLevel(logging.ERROR)
     logging.getLogger('google.rpc').setLevel(logging.ERROR)
     
+    file_handler = BufferedFileHandler(LOGS_DIR / log_file, mode='a')
+    atexit.register(file_handler.flush_buffer)
+    
     # Configure root logger
     logging.basicConfig(
         level=log_level,
@@ -41,7 +92,7 @@ def setup_logging(log_level=logging.INFO, log_file="app.log"):
         datefmt='%Y-%m-%d %H:%M:%S',
         handlers=[
             logging.StreamHandler(sys.stdout),
-            logging.FileHandler(LOGS_DIR / log_file, mode='a')
+            file_handler
         ],
         force=True  # Override any existing configuration
     )
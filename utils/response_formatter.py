@@ -6,6 +6,103 @@ from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Patterns for format_response, compiled once at import.
+# Each pipeline is an ordered list of (pattern, replacement) passes.
+
+# Prefixes of responses that already arrive formatted
+_FORMATTED_PREFIXES = ('📊', '💰', '📈', '⚠️', '💡', '✅', '🎯', '📋', '🔍', '💼', '#')
+
+# 9-10. Whitespace cleanup, also applied to already-formatted responses
+_BLANK_LINES_PATTERN = re.compile(r'\n{3,}')
+_SENTENCE_SPACING_PATTERN = re.compile(r'\.(\S)')
+
+# 1-3. Section spacing, bullet points and numbered lists
+_STRUCTURE_PIPELINE = [
+    (re.compile(r'(\*\*[A-Z][^*]+\*\*:)'), r'\n\n\1'),
+    (re.compile(r'^(\s*)-\s*(\*\*)', re.MULTILINE), r'\n\1- \2'),
+    (re.compile(r'^(\s*)\*\s+', re.MULTILINE), r'\n\1- '),
+    (re.compile(r'^(\d+\.)\s+', re.MULTILINE), r'\n\1 '),
+]
+
+# 4. Tables: a run of lines containing '|', plus the line that follows it
+_TABLE_PATTERN = re.compile(r'^((?:[^\n]*\|[^\n]*\n)*[^\n]*\|[^\n]*)(?:\n([^\n]*))?', re.MULTILINE)
+
+# 5-6. Currency and percentages
+_NUMBER_PIPELINE = [
+    (re.compile(r'(?:Rs\.?|INR)\s*(\d)'), r'₹\1'),
+    (re.compile(r'(\d+\.?\d*)\s*%'), r'\1%'),
+]
+
+# 7. Emoji for bold section keywords, matched in one pass
+_SECTION_EMOJIS = {
+    'Total Value': '💰', 'Total Portfolio': '💰', 'Total Investment': '💰',
+    'Return': '📈', 'Risk': '⚠️', 'Warning': '⚠️', 'Alert': '⚠️',
+    'Recommendation': '💡', 'Action': '✅', 'Goal': '🎯', 'Strategy': '📋',
+    'Analysis': '📊', 'Market': '🔍', 'Tax': '💼',
+}
+_SECTION_ALIASES = {'Returns': 'Return'}
+# Longest first, so "Returns" is tried before "Return"
+_SECTION_PATTERN = re.compile(
+    r'\*\*(' + '|'.join(map(re.escape, sorted([*_SECTION_EMOJIS, *_SECTION_ALIASES], key=len, reverse=True)))
+    + r')([^*]*)\*\*'
+)
+
+# 8-11. Headers, whitespace, code blocks
+_CLEANUP_PIPELINE = [
+    (re.compile(r'\n(#{1,6})\s*([^\n]+)'), r'\n\n\1 \2\n'),
+    (_BLANK_LINES_PATTERN, '\n\n'),
+    (_SENTENCE_SPACING_PATTERN, r'. \1'),
+    (re.compile(r'```(\w+)?\n'), r'\n```\1\n'),
+    (re.compile(r'\n```\s*\n'), r'\n```\n\n'),
+]
+
+# 12. Fund house names, matched in one pass (HDFC, ICICI, ... / Aditya Birla)
+_FUND_KEYWORDS = ['hdfc', 'icici', 'sbi', 'axis', 'kotak', 'nippon', 'aditya birla', 'mirae', 'parag parikh']
+_FUND_PATTERN = re.compile(r'\b(?:' + '|'.join(map(re.escape, _FUND_KEYWORDS)) + r')\b', re.IGNORECASE)
+
+# 13. Dividers before major sections (one alternation instead of a pass per emoji)
+_DIVIDER_PATTERN = re.compile(r'\n((?:📊|💡|⚠️|✅) \*\*.*?\*\*)')
+
+
+def _format_fund_name(match: re.Match) -> str:
+    name = match.group(0)
+    return name.upper() if len(name) <= 6 else name.title()
+
+
+def _space_table(match: re.Match) -> str:
+    """
+    Put a blank line before a table (unless the line above is already blank)
+    and after the line that ends it. Blank lines this doubles up are
+    collapsed by the later blank-line pass.
+    """
+    text, start = match.string, match.start()
+    table, after = match.group(1), match.group(2)
+    
+    if start and text[text.rfind('\n', 0, start - 1) + 1:start - 1].strip():
+        table = '\n' + table
+    if after is not None:
+        table += '\n' + after + ('\n' if after.strip() else '')
+    return table
+
+
+def _add_section_emoji(match: re.Match) -> str:
+    label = _SECTION_ALIASES.get(match.group(1), match.group(1))
+    return f"{_SECTION_EMOJIS[label]} **{label}{match.group(2)}**"
+
+
+def _should_format(raw_response: str) -> bool:
+    """
+    Whether a response needs the full formatting pipeline.
+    Responses that already open with a section emoji or header and have no
+    Rs./INR amounts near the top only need whitespace cleanup.
+    """
+    if not raw_response.startswith(_FORMATTED_PREFIXES):
+        return True
+    
+    head = raw_response[:2048]
+    return 'Rs.' in head or 'INR ' in head
+
+
 def format_response(raw_response: str) -> str:
     """
     Format raw LLM response with better markdown formatting
@@ -17,93 +114,43 @@ def format_response(raw_response: str) -> str:
         Formatted markdown text
     """
     try:
+        if not _should_format(raw_response):
+            # Already formatted: only clean up whitespace (steps 9, 10 and 14)
+            formatted = _BLANK_LINES_PATTERN.sub('\n\n', raw_response)
+            formatted = _SENTENCE_SPACING_PATTERN.sub(r'. \1', formatted)
+            return formatted.strip()
+        
         formatted = raw_response
         
-        # 1. Add line breaks before main sections for better spacing
-        formatted = re.sub(r'(\*\*[A-Z][^*]+\*\*:)', r'\n\n\1', formatted)
+        # 1-3. Section spacing, bullet points and numbered lists
+        for pattern, repl in _STRUCTURE_PIPELINE:
+            formatted = pattern.sub(repl, formatted)
         
-        # 2. Format bullet points consistently with proper spacing
-        formatted = re.sub(r'^(\s*)-\s*(\*\*)', r'\n\1- \2', formatted, flags=re.MULTILINE)
-        formatted = re.sub(r'^(\s*)\*\s+', r'\n\1- ', formatted, flags=re.MULTILINE)
+        # 4. Format tables properly - ensure spacing
+        formatted = _TABLE_PATTERN.sub(_space_table, formatted)
         
-        # 3. Add spacing around numbered lists
-        formatted = re.sub(r'^(\d+\.)\s+', r'\n\1 ', formatted, flags=re.MULTILINE)
+        # 5-6. Currency and percentages
+        for pattern, repl in _NUMBER_PIPELINE:
+            formatted = pattern.sub(repl, formatted)
         
-        # 4. Format tables properly - ensure spacing
-        lines = formatted.split('\n')
-        in_table = False
-        new_lines = []
-        
-        for i, line in enumerate(lines):
-            stripped = line.strip()
-            
-            # Detect table start
-            if '|' in stripped and not in_table:
-                if new_lines and new_lines[-1].strip():
-                    new_lines.append('')  # Add blank line before table
-                in_table = True
-            
-            # Detect table end
-            elif in_table and '|' not in stripped:
-                in_table = False
-                new_lines.append(line)
-                if stripped:  # Add blank line after table
-                    new_lines.append('')
-                continue
-            
-            new_lines.append(line)
-        
-        formatted = '\n'.join(new_lines)
-        
-        # 5. Format currency consistently
-        formatted = re.sub(r'Rs\.?\s*(\d)', r'₹\1', formatted)
-        formatted = re.sub(r'INR\s*(\d)', r'₹\1', formatted)
-        
-        # 6. Format percentages consistently
-        formatted = re.sub(r'(\d+\.?\d*)\s*%', r'\1%', formatted)
-        
-        # 7. Add emphasis to key metrics with emojis
-        formatted = re.sub(r'\*\*Total (Value|Portfolio|Investment)([^*]*)\*\*', r'💰 **Total \1\2**', formatted)
-        formatted = re.sub(r'\*\*Returns?([^*]*)\*\*', r'📈 **Return\1**', formatted)
-        formatted = re.sub(r'\*\*(Risk|Warning|Alert)([^*]*)\*\*', r'⚠️ **\1\2**', formatted)
-        formatted = re.sub(r'\*\*Recommendation([^*]*)\*\*', r'💡 **Recommendation\1**', formatted)
-        formatted = re.sub(r'\*\*Action([^*]*)\*\*', r'✅ **Action\1**', formatted)
-        formatted = re.sub(r'\*\*Goal([^*]*)\*\*', r'🎯 **Goal\1**', formatted)
-        formatted = re.sub(r'\*\*Strategy([^*]*)\*\*', r'📋 **Strategy\1**', formatted)
-        formatted = re.sub(r'\*\*Analysis([^*]*)\*\*', r'📊 **Analysis\1**', formatted)
-        formatted = re.sub(r'\*\*Market([^*]*)\*\*', r'🔍 **Market\1**', formatted)
-        formatted = re.sub(r'\*\*Tax([^*]*)\*\*', r'💼 **Tax\1**', formatted)
-        
-        # 8. Format section headers with proper spacing
-        formatted = re.sub(r'\n(#{1,6})\s*([^\n]+)', r'\n\n\1 \2\n', formatted)
-        
-        # 9. Clean up excessive blank lines (max 2 consecutive)
-        formatted = re.sub(r'\n{3,}', '\n\n', formatted)
-        
-        # 10. Ensure single space after periods in sentences
-        formatted = re.sub(r'\.(\S)', r'. \1', formatted)
-        
-        # 11. Format code blocks properly
-        formatted = re.sub(r'```(\w+)?\n', r'\n```\1\n', formatted)
-        formatted = re.sub(r'\n```\s*\n', r'\n```\n\n', formatted)
+        # 7. Add emojis for better visual hierarchy
+        formatted = _SECTION_PATTERN.sub(_add_section_emoji, formatted)
+        
+        # 8-11. Headers, whitespace, code blocks
+        for pattern, repl in _CLEANUP_PIPELINE:
+            formatted = pattern.sub(repl, formatted)
         
         # 12. Format fund names consistently (all caps HDFC, ICICI, etc)
-        fund_keywords = ['hdfc', 'icici', 'sbi', 'axis', 'kotak', 'nippon', 'aditya birla', 'mirae', 'parag parikh']
-        for keyword in fund_keywords:
-            pattern = re.compile(r'\b' + keyword + r'\b', re.IGNORECASE)
-            formatted = pattern.sub(lambda m: m.group(0).upper() if len(m.group(0)) <= 6 else m.group(0).title(), formatted)
+        formatted = _FUND_PATTERN.sub(_format_fund_name, formatted)
         
         # 13. Add dividers for major sections
-        formatted = re.sub(r'\n(📊 \*\*.*?\*\*)', r'\n---\n\n\1', formatted)
-        formatted = re.sub(r'\n(💡 \*\*.*?\*\*)', r'\n---\n\n\1', formatted)
-        formatted = re.sub(r'\n(⚠️ \*\*.*?\*\*)', r'\n---\n\n\1', formatted)
-        formatted = re.sub(r'\n(✅ \*\*.*?\*\*)', r'\n---\n\n\1', formatted)
+        formatted = _DIVIDER_PATTERN.sub(r'\n---\n\n\1', formatted)
         
         # 14. Trim leading/trailing whitespace
         formatted = formatted.strip()
         
         # 15. Ensure the response starts cleanly
-        if not formatted.startswith(('📊', '💰', '📈', '⚠️', '💡', '✅', '🎯', '📋', '🔍', '💼', '#')):
+        if not formatted.startswith(_FORMATTED_PREFIXES):
             # Add a nice header if missing
             formatted = f"📊 **Analysis**\n\n{formatted}"
         
@@ -111,7 +158,7 @@ def format_response(raw_response: str) -> str:
         return formatted
         
     except Exception as e:
-        logger.error(f"Error formatting response: {str(e)}")
+        logger.error("Error formatting response: %s", e)
         return raw_response  # Return original if formatting fails
 
 
@@ -158,7 +205,7 @@ Equity: {equity_pct:.1f}% │ Debt: {debt_pct:.1f}% │ Hybrid: {hybrid_pct:.1f}
         return summary.strip()
         
     except Exception as e:
-        logger.error(f"Error formatting portfolio summary: {str(e)}")
+        logger.error("Error formatting portfolio summary: %s", e)
         return "Unable to format portfolio summary"
 
 
@@ -206,7 +253,7 @@ def format_comparison_table(funds_data: list) -> str:
         return table
         
     except Exception as e:
-        logger.error(f"Error formatting comparison table: {str(e)}")
+        logger.error("Error formatting comparison table: %s", e)
         return "Unable to format comparison table"
 
 
@@ -3,140 +3,607 @@ FAISS Vector Store - Local storage with OpenAI embeddings
 For portfolio and fund metadata embeddings
 """
 import faiss
+import hashlib
+import json
 import numpy as np
 import pickle
 import os
-from typing import List, Dict, Optional
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, List, Dict, Optional, Tuple
 from openai import OpenAI
 import config
 
 class LocalVectorStore:
-    def __init__(self, store_path='./data/vector_store'):
+    # Index types persisted in index.meta. Vectors are stored as 8-bit scalar
+    # quantized codes (4x smaller than float32). An index without a marker is
+    # a legacy float32 IndexFlatL2 and is migrated on load.
+    FLAT_INDEX = 'sq8_ip'
+    HNSW_INDEX = 'hnsw_sq8_ip'
+    
+    # Switch from exhaustive search to an HNSW graph above this many vectors
+    HNSW_THRESHOLD = 1000
+    HNSW_M = 32
+    HNSW_EF_CONSTRUCTION = 200
+    HNSW_EF_SEARCH = 64
+    
+    # A search that finds the store mid-rewrite retries this often before giving up
+    REWRITE_RETRIES = 3
+    REWRITE_RETRY_DELAY = 0.1
+    
+    # Texts per embeddings request; larger adds are split and sent concurrently
+    EMBEDDING_BATCH_SIZE = 256
+    EMBEDDING_MAX_WORKERS = 8
+    
+    def __init__(self, store_path='./data/vector_store', read_only: bool = False):
         self.store_path = store_path
+        self.read_only = read_only
         self.index_file = f"{store_path}/faiss.index"
-        self.metadata_file = f"{store_path}/metadata.pkl"
+        self.metadata_file = f"{store_path}/metadata.pkl"  # Legacy, migrated into metadata.db
+        self.metadata_db_file = f"{store_path}/metadata.db"
+        self.index_meta_file = f"{store_path}/index.meta"
+        self.emb_cache_file = f"{store_path}/emb_cache.db"
         self.client = OpenAI(api_key=config.OPENAI_API_KEY)
-        self.embedding_model = "text-embedding-3-small"  # 1536 dimensions
-        self.dimension = 1536
+        # text-embedding-3 models can return shortened vectors via `dimensions`
+        self.embedding_model = config.EMBEDDING_MODEL
+        self.dimension = config.EMBEDDING_DIMENSION
+        
+        # Let FAISS use every core for its OpenMP/BLAS distance kernels,
+        # unless the thread count was set explicitly
+        if 'OMP_NUM_THREADS' not in os.environ:
+            faiss.omp_set_num_threads(os.cpu_count() or 1)
         
         # Create directory
-        os.makedirs(store_path, exist_ok=True)
+        if not read_only:
+            os.makedirs(store_path, exist_ok=True)
         
-        # Load or create index
+        # Metadata lives in SQLite, one row per vector (rowid = FAISS id), so
+        # adds append rows instead of rewriting the whole metadata blob.
+        # Rows hold pickled dicts, so raw values need no JSON round trip.
+        # A read-only store never writes: it opens the database read-only
+        # (once a writer has created it) and leaves the schema to writers.
+        self.db = None
+        self.emb_cache = None
+        if not read_only:
+            self.db = sqlite3.connect(self.metadata_db_file, check_same_thread=False)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            with self.db:
+                self.db.execute("CREATE TABLE IF NOT EXISTS metadata (rowid INTEGER PRIMARY KEY, data BLOB NOT NULL)")
+            
+            # Embedding cache keyed by a hash of the embedded text, so reindexing
+            # only sends texts that changed since the last run to OpenAI. Kept in
+            # its own file so clearing the store doesn't discard it.
+            self.emb_cache = sqlite3.connect(self.emb_cache_file, check_same_thread=False)
+            self.emb_cache.execute("PRAGMA journal_mode=WAL")
+            with self.emb_cache:
+                self.emb_cache.execute("CREATE TABLE IF NOT EXISTS cache (hash TEXT PRIMARY KEY, vec BLOB NOT NULL)")
+        
+        # Load or create index. Every write bumps a generation number stored
+        # in both metadata.db (user_version) and index.meta; a long-lived
+        # store reloads its index when another process has rewritten it.
         self.index = None
-        self.metadata = []
+        self.generation = 0
+        self._legacy_metadata = None
+        self._lock = threading.Lock()
         self.load()
     
     def load(self):
-        """Load existing FAISS index and metadata"""
-        if os.path.exists(self.index_file) and os.path.exists(self.metadata_file):
-            self.index = faiss.read_index(self.index_file)
-            with open(self.metadata_file, 'rb') as f:
-                self.metadata = pickle.load(f)
+        """
+        Load existing FAISS index and metadata. A read-only store serves a
+        legacy (pre-SQLite, L2) store from memory; writers migrate it on disk.
+        """
+        self._legacy_metadata = None
+        if self.db is None and os.path.exists(self.metadata_db_file):
+            self.db = sqlite3.connect(
+                f"{Path(self.metadata_db_file).absolute().as_uri()}?mode=ro", uri=True, check_same_thread=False
+            )
+        
+        self.index, index_meta = self._read_committed_index()
+        if self.index is not None:
+            index_type = index_meta.get('index_type')
+            self.generation = index_meta.get('generation', 0)
+            
+            if self.index.d != self.dimension:
+                self._reset_index(
+                    f"⚠️ FAISS index holds {self.index.d}-d vectors but EMBEDDING_DIMENSION is "
+                    f"{self.dimension}. Re-upload the portfolio to rebuild the index."
+                )
+                return
+            if not self.read_only and self.generation != self._db_generation():
+                # Only stores written before writes were staged can get here
+                self._reset_index(
+                    "⚠️ FAISS index doesn't match metadata.db (an earlier write was interrupted). "
+                    "Re-upload the portfolio to rebuild the index."
+                )
+                return
+            
+            if os.path.exists(self.metadata_file):
+                self._migrate_pickle_metadata()
             print(f"✓ Loaded FAISS index with {self.index.ntotal} vectors")
+            
+            if index_type is None:
+                self._migrate_index()
+            elif isinstance(self.index, faiss.IndexHNSW):
+                self.index.hnsw.efSearch = self.HNSW_EF_SEARCH
         else:
-            # Create new index (1536 dimensions for text-embedding-3-small)
-            self.index = faiss.IndexFlatL2(self.dimension)
-            self.metadata = []
+            # Create new index (EMBEDDING_DIMENSION, 512 by default).
+            # Inner product over L2-normalized vectors is cosine similarity.
+            self.index = self._new_index(0)
+            if not self.read_only:
+                with self.db:
+                    self.db.execute("DELETE FROM metadata")
+            self.generation = self._db_generation()
             print("✓ Created new FAISS index with OpenAI embeddings")
     
-    def save(self):
-        """Save FAISS index and metadata to disk"""
-        faiss.write_index(self.index, self.index_file)
-        with open(self.metadata_file, 'wb') as f:
-            pickle.dump(self.metadata, f)
-        print(f"✓ Saved FAISS index with {self.index.ntotal} vectors")
+    def _reset_index(self, message: str):
+        """Discard an index that can't be used and start over with an empty store"""
+        print(message)
+        if self.read_only:
+            self.index = self._new_index(0)
+            return
+        self._commit(self._new_index(0), lambda: self.db.execute("DELETE FROM metadata"))
+        if os.path.exists(self.metadata_file):
+            os.remove(self.metadata_file)
     
-    def add_texts(self, texts: List[str], metadatas: List[Dict]):
-        """Add texts to vector store using OpenAI embeddings"""
-        if not texts:
+    def _read_committed_index(self) -> Tuple[Optional[faiss.Index], Dict]:
+        """
+        Read the index matching the committed metadata, with its index.meta
+        contents (None if there is no index yet). A write interrupted after
+        its metadata commit leaves the new index staged in .tmp files:
+        writers finish renaming them into place, readers read them as is.
+        """
+        if not self.read_only:
+            self._finish_staged_write()
+        
+        index_meta = self._read_index_meta()
+        staged_meta = self._read_staged_index_meta()
+        if self.read_only and staged_meta and staged_meta.get('generation') == self._db_generation():
+            index_meta = staged_meta
+            if os.path.exists(f"{self.index_file}.tmp"):
+                try:
+                    return faiss.read_index(f"{self.index_file}.tmp"), index_meta
+                except RuntimeError:
+                    pass  # The writer renamed it into place meanwhile
+        
+        if not os.path.exists(self.index_file):
+            return None, index_meta
+        if self.read_only and index_meta.get('index_type') == self.FLAT_INDEX and not os.path.exists(self.metadata_file):
+            # Memory-map the SQ8 codes: pages are loaded on demand and
+            # shared between processes serving the same store. HNSW
+            # indexes can't be mapped (IO_FLAG_MMAP only covers IVF
+            # lists), so they are read into memory.
+            return faiss.read_index(self.index_file, faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY), index_meta
+        return faiss.read_index(self.index_file), index_meta
+    
+    def _finish_staged_write(self):
+        """
+        Complete a write interrupted after its metadata commit by renaming
+        its staged files into place; discard one interrupted before it.
+        """
+        staged_meta = self._read_staged_index_meta()
+        if staged_meta and staged_meta.get('generation') == self._db_generation():
+            # The index is staged first, so if it's gone it was already renamed
+            if os.path.exists(f"{self.index_file}.tmp"):
+                os.replace(f"{self.index_file}.tmp", self.index_file)
+            os.replace(f"{self.index_meta_file}.tmp", self.index_meta_file)
+            print("✓ Completed an interrupted vector store write")
+        else:
+            self._discard_staged()
+    
+    def _migrate_pickle_metadata(self):
+        """Move metadata from the legacy metadata.pkl list into metadata.db (read-only: keep it in memory)"""
+        with open(self.metadata_file, 'rb') as f:
+            metadata = pickle.load(f)
+        
+        if self.read_only:
+            self._legacy_metadata = metadata
+            print(f"⚠️ Read {len(metadata)} legacy metadata records; migration deferred until the store is opened for writing")
             return
         
-        # Generate embeddings using OpenAI
+        with self.db:
+            self.db.execute("DELETE FROM metadata")
+            self._insert_metadata(0, metadata)
+        os.remove(self.metadata_file)
+        print(f"✓ Migrated {len(metadata)} metadata records to SQLite")
+    
+    def _insert_metadata(self, start_id: int, metadatas: List[Dict]):
+        """Append metadata rows for vectors numbered from start_id (caller commits)"""
+        self._insert_metadata_rows(self._serialize_metadata(start_id, metadatas))
+    
+    @staticmethod
+    def _serialize_metadata(start_id: int, metadatas: List[Dict]) -> List[tuple]:
+        """Build (rowid, pickled dict) rows for vectors numbered from start_id"""
+        return [
+            (i, sqlite3.Binary(pickle.dumps(m, protocol=pickle.HIGHEST_PROTOCOL)))
+            for i, m in enumerate(metadatas, start=start_id)
+        ]
+    
+    def _insert_metadata_rows(self, rows: List[tuple]):
+        """Insert pre-serialized metadata rows (caller commits)"""
+        self.db.executemany("INSERT OR REPLACE INTO metadata (rowid, data) VALUES (?, ?)", rows)
+    
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed one batch of texts with a single OpenAI request"""
         response = self.client.embeddings.create(
             model=self.embedding_model,
-            input=texts
+            input=texts,
+            dimensions=self.dimension
         )
+        return [item.embedding for item in response.data]
+    
+    def _fetch_metadata(self, ids: List[int]) -> Tuple[int, Dict[int, Dict]]:
+        """Fetch metadata for the given vector ids only, with the generation it belongs to"""
+        if self._legacy_metadata is not None:
+            return self.generation, {i: self._legacy_metadata[i] for i in ids if i < len(self._legacy_metadata)}
+        if self.db is None:
+            return 0, {}
+        
+        placeholders = ','.join('?' * len(ids))
+        # One read transaction, so rows and generation come from the same snapshot
+        self.db.execute("BEGIN")
+        try:
+            generation = self.db.execute("PRAGMA user_version").fetchone()[0]
+            rows = self.db.execute(
+                f"SELECT rowid, data FROM metadata WHERE rowid IN ({placeholders})", ids
+            ).fetchall()
+        finally:
+            self.db.commit()
+        return generation, {rowid: pickle.loads(data) for rowid, data in rows}
+    
+    def _db_generation(self) -> int:
+        """Generation of the metadata currently in metadata.db"""
+        if self.db is None:
+            return 0
+        return self.db.execute("PRAGMA user_version").fetchone()[0]
+    
+    def _refresh(self) -> bool:
+        """
+        Reload the index if another process has rewritten the store since it
+        was loaded. Returns False if the index still doesn't match the
+        metadata after reloading (a writer committed in between).
+        """
+        if self.read_only and self.db is None and os.path.exists(self.metadata_db_file):
+            self.load()
+        if self._db_generation() != self.generation:
+            self.load()
+        return self._db_generation() == self.generation
+    
+    def _read_index_meta(self) -> Dict:
+        """Read the index type marker and generation written alongside the index"""
+        if not os.path.exists(self.index_meta_file):
+            return {}
+        with open(self.index_meta_file, 'r') as f:
+            return json.load(f)
+    
+    def _read_staged_index_meta(self) -> Dict:
+        """Read the index.meta of a staged write ({} if none, or if it was cut off mid-write)"""
+        try:
+            with open(f"{self.index_meta_file}.tmp", 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _new_index(self, num_vectors: int):
+        """
+        Create an empty inner-product SQ8 index sized for num_vectors.
+        Small stores use an exhaustive scan; large ones an HNSW graph.
+        
+        Every component of an L2-normalized vector lies in [-1, 1], so the
+        quantizer is trained once on that fixed range and vectors can be
+        added later without retraining.
+        """
+        if num_vectors > self.HNSW_THRESHOLD:
+            index = faiss.IndexHNSWSQ(
+                self.dimension, faiss.ScalarQuantizer.QT_8bit, self.HNSW_M, faiss.METRIC_INNER_PRODUCT
+            )
+            index.hnsw.efConstruction = self.HNSW_EF_CONSTRUCTION
+            index.hnsw.efSearch = self.HNSW_EF_SEARCH
+        else:
+            index = faiss.IndexScalarQuantizer(
+                self.dimension, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT
+            )
+        unit_range = np.array([[-1.0] * self.dimension, [1.0] * self.dimension], dtype=np.float32)
+        index.train(unit_range)
+        return index
+    
+    def _build_index(self, vectors: np.ndarray):
+        """Create an index holding vectors"""
+        index = self._new_index(len(vectors))
+        if len(vectors):
+            index.add(vectors)
+        return index
+    
+    def _index_type(self, index=None) -> str:
+        """Marker for index (default: the current one), as written to index.meta"""
+        if isinstance(self.index if index is None else index, faiss.IndexHNSW):
+            return self.HNSW_INDEX
+        return self.FLAT_INDEX
+    
+    def _stored_vectors(self) -> np.ndarray:
+        """Decode all stored vectors (quantized indexes return approximations)"""
+        if not self.index.ntotal:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        return self.index.reconstruct_n(0, self.index.ntotal)
+    
+    def _rebuild_index(self, new_vectors: Optional[np.ndarray] = None):
+        """
+        Build a new index (choosing its type by size) from stored plus new
+        vectors. Stored codes decode and re-encode to the same codes, since
+        every index uses the same fixed-range quantizer.
+        """
+        vectors = self._stored_vectors()
+        if new_vectors is not None:
+            vectors = np.vstack([vectors, new_vectors])
+        return self._build_index(vectors)
+    
+    def _migrate_index(self):
+        """
+        Rebuild a legacy IndexFlatL2 as SQ8 inner product. Its vectors are
+        L2-normalized first so inner product is cosine similarity.
+        """
+        vectors = self._stored_vectors()
+        faiss.normalize_L2(vectors)
+        self.index = self._build_index(vectors)
+        if self.read_only:
+            print("⚠️ Converted legacy FAISS index in memory; migration deferred until the store is opened for writing")
+            return
+        self.save()
+        print("✓ Migrated FAISS index to 8-bit quantized cosine similarity")
+    
+    def save(self):
+        """Save FAISS index to disk (metadata is written as it is added)"""
+        self._stage(self.index, self.generation)
+        self._install_staged()
+    
+    def _stage(self, index, generation: int):
+        """
+        Write index and its index.meta to .tmp files, synced to disk so they
+        survive a crash once the metadata transaction has committed
+        """
+        faiss.write_index(index, f"{self.index_file}.tmp")
+        with open(f"{self.index_file}.tmp", 'rb') as f:
+            os.fsync(f.fileno())
+        with open(f"{self.index_meta_file}.tmp", 'w') as f:
+            json.dump({
+                'index_type': self._index_type(index),
+                'dimension': self.dimension,
+                'generation': generation,
+            }, f)
+            f.flush()
+            os.fsync(f.fileno())
+    
+    def _install_staged(self):
+        """Rename the staged files into place (index.meta last: it marks the write complete)"""
+        os.replace(f"{self.index_file}.tmp", self.index_file)
+        os.replace(f"{self.index_meta_file}.tmp", self.index_meta_file)
+        print(f"✓ Saved FAISS index with {self.index.ntotal} vectors")
+    
+    def _discard_staged(self):
+        """Remove the staged files of a write that didn't commit"""
+        for path in (f"{self.index_file}.tmp", f"{self.index_meta_file}.tmp"):
+            if os.path.exists(path):
+                os.remove(path)
+    
+    def _commit(self, index, write_metadata: Callable[[], None]):
+        """
+        Write index and metadata as the next generation of the store.
+        The index is staged in .tmp files, then write_metadata() runs in a
+        transaction that also bumps metadata.db's generation (the commit
+        point), then the staged files are renamed into place. A crash
+        before the commit leaves the old store intact; after it, the next
+        load finishes the rename. Readers reload when the generation moves.
+        """
+        generation = self._db_generation() + 1
+        try:
+            self._stage(index, generation)
+            with self.db:
+                self.db.execute("BEGIN")
+                write_metadata()
+                self.db.execute(f"PRAGMA user_version = {generation}")
+        except Exception:
+            self._discard_staged()
+            raise
+        self.index = index
+        self.generation = generation
+        self._install_staged()
+    
+    def _check_writable(self):
+        """Adds need a full index rewrite, which a read-only store can't do"""
+        if self.read_only:
+            raise RuntimeError("Vector store was opened read-only; open it with read_only=False to modify")
+    
+    def _text_hash(self, text: str) -> str:
+        """Embedding cache key; includes model and dimension so changing either misses"""
+        return hashlib.sha256(f"{self.embedding_model}:{self.dimension}:{text}".encode()).hexdigest()
+    
+    def _cached_embeddings(self, hashes: List[str]) -> Dict[str, np.ndarray]:
+        """Look up cached embeddings for the given text hashes"""
+        found = {}
+        # Stay under SQLite's bound-parameter limit
+        for i in range(0, len(hashes), 900):
+            chunk = hashes[i:i + 900]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.emb_cache.execute(
+                f"SELECT hash, vec FROM cache WHERE hash IN ({placeholders})", chunk
+            )
+            found.update((h, np.frombuffer(vec, dtype=np.float32)) for h, vec in rows)
+        return found
+    
+    def _prune_embedding_cache(self, live_hashes: List[str]):
+        """Drop cached embeddings for texts no longer in the store"""
+        with self.emb_cache:
+            self.emb_cache.execute("CREATE TEMP TABLE IF NOT EXISTS live (hash TEXT PRIMARY KEY)")
+            self.emb_cache.execute("DELETE FROM live")
+            self.emb_cache.executemany("INSERT OR IGNORE INTO live (hash) VALUES (?)", ((h,) for h in live_hashes))
+            self.emb_cache.execute("DELETE FROM cache WHERE hash NOT IN (SELECT hash FROM live)")
+            self.emb_cache.execute("DELETE FROM live")
+    
+    def _embed_texts(self, texts: List[str], metadatas: List[Dict], start_id: int, prune_cache: bool = False):
+        """
+        Embed texts, reusing cached embeddings for texts seen before and
+        sending the misses to OpenAI in concurrent sub-batches (metadata is
+        serialized while the requests are in flight).
+        With prune_cache, texts become the whole store, so cached embeddings
+        of any other text are dropped.
+        Returns L2-normalized vectors and metadata rows numbered from start_id.
+        """
+        hashes = [self._text_hash(t) for t in texts]
+        cached = self._cached_embeddings(list(set(hashes)))
         
-        # Extract embeddings
-        embeddings = [item.embedding for item in response.data]
+        # Embed each uncached text once, even if it appears more than once
+        missing = {}
+        for h, t in zip(hashes, texts):
+            if h not in cached:
+                missing.setdefault(h, t)
+        missing_hashes = list(missing)
+        missing_texts = list(missing.values())
         
-        # Add to FAISS index
-        self.index.add(np.array(embeddings).astype('float32'))
+        batches = [
+            missing_texts[i:i + self.EMBEDDING_BATCH_SIZE]
+            for i in range(0, len(missing_texts), self.EMBEDDING_BATCH_SIZE)
+        ]
+        with ThreadPoolExecutor(max_workers=max(1, min(self.EMBEDDING_MAX_WORKERS, len(batches)))) as executor:
+            futures = [executor.submit(self._embed_batch, batch) for batch in batches]
+            metadata_rows = self._serialize_metadata(start_id, metadatas)
+            embeddings = [embedding for future in futures for embedding in future.result()]
         
-        # Store metadata
-        self.metadata.extend(metadatas)
+        if embeddings:
+            fresh = np.asarray(embeddings, dtype=np.float32, order='C')
+            with self.emb_cache:
+                self.emb_cache.executemany(
+                    "INSERT OR REPLACE INTO cache (hash, vec) VALUES (?, ?)",
+                    [(h, sqlite3.Binary(v.tobytes())) for h, v in zip(missing_hashes, fresh)]
+                )
+            cached.update(zip(missing_hashes, fresh))
+        if prune_cache:
+            self._prune_embedding_cache(hashes)
+        reused = len(texts) - len(missing_texts)
+        if reused:
+            print(f"✓ Reused {reused} cached embeddings")
         
-        # Save to disk
-        self.save()
+        # Normalized so inner product = cosine similarity
+        vectors = np.empty((len(texts), self.dimension), dtype=np.float32)
+        for i, h in enumerate(hashes):
+            vectors[i] = cached[h]
+        faiss.normalize_L2(vectors)
+        return vectors, metadata_rows
+    
+    def add_texts(self, texts: List[str], metadatas: List[Dict]):
+        """Add texts to vector store using OpenAI embeddings"""
+        self._check_writable()
+        if not texts:
+            return
+        
+        vectors, metadata_rows = self._embed_texts(texts, metadatas, self.index.ntotal)
+        
+        if isinstance(self.index, faiss.IndexHNSW) or self.index.ntotal + len(vectors) <= self.HNSW_THRESHOLD:
+            index = self.index
+            index.add(vectors)
+        else:
+            # Outgrew exhaustive search: move everything to an HNSW graph
+            index = self._rebuild_index(vectors)
+        
+        try:
+            self._commit(index, lambda: self._insert_metadata_rows(metadata_rows))
+        except Exception:
+            if index is self.index:
+                self.load()  # Drop the vectors added in memory
+            raise
         print(f"✓ Added {len(texts)} texts with OpenAI embeddings")
     
+    def replace_all(self, texts: List[str], metadatas: List[Dict]):
+        """
+        Replace the whole store with texts in a single write (instead of
+        clear() followed by add_texts(), which rewrites the index twice).
+        The new index is built in memory and committed together with the
+        new metadata rows (see _commit).
+        """
+        self._check_writable()
+        if texts:
+            vectors, metadata_rows = self._embed_texts(texts, metadatas, 0, prune_cache=True)
+            index = self._build_index(vectors)
+        else:
+            self._prune_embedding_cache([])
+            metadata_rows = []
+            index = self._new_index(0)
+        
+        def write_metadata():
+            self.db.execute("DELETE FROM metadata")
+            self._insert_metadata_rows(metadata_rows)
+        self._commit(index, write_metadata)
+        print(f"✓ Replaced vector store with {len(texts)} texts")
+    
     def search(self, query: str, k: int = 5) -> List[Dict]:
         """Search for similar texts using OpenAI embeddings"""
-        if self.index.ntotal == 0:
-            return []
+        with self._lock:
+            self._refresh()
+            if self.index.ntotal == 0:
+                return []
         
         # Embed query using OpenAI
         response = self.client.embeddings.create(
             model=self.embedding_model,
-            input=[query]
+            input=[query],
+            dimensions=self.dimension
         )
-        query_embedding = response.data[0].embedding
+        query_embedding = np.asarray([response.data[0].embedding], dtype=np.float32, order='C')
+        faiss.normalize_L2(query_embedding)
+        
+        with self._lock:
+            for _ in range(self.REWRITE_RETRIES):
+                if self._refresh():
+                    results = self._search_index(query_embedding, k)
+                    if results is not None:
+                        return results
+                time.sleep(self.REWRITE_RETRY_DELAY)
         
-        # Search FAISS
+        print("⚠️ Vector store is being rewritten; no results returned")
+        return []
+    
+    def _search_index(self, query_embedding: np.ndarray, k: int) -> Optional[List[Dict]]:
+        """
+        Search the loaded index and attach metadata. Returns None if the
+        metadata was rewritten after the index was loaded.
+        """
+        if self.index.ntotal == 0:
+            return []
+        
+        # Search FAISS (scores are cosine similarities, higher is closer)
         distances, indices = self.index.search(
-            np.array([query_embedding]).astype('float32'), 
+            query_embedding, 
             min(k, self.index.ntotal)
         )
         
-        # Return results with metadata
-        results = []
-        for i, idx in enumerate(indices[0]):
-            if idx < len(self.metadata):
-                results.append({
-                    'metadata': self.metadata[idx],
-                    'score': float(distances[0][i])
-                })
+        # Return results with metadata, fetching only the hit rows.
+        # FAISS pads missing hits with -1; convert to Python lists in bulk.
+        ids, scores = indices[0], distances[0]
+        valid = ids >= 0
+        ids, scores = ids[valid].tolist(), scores[valid].tolist()
+        generation, metadata = self._fetch_metadata(ids)
+        if generation != self.generation:
+            return None
         
-        return results
+        return [
+            {'metadata': metadata[idx], 'score': score}
+            for idx, score in zip(ids, scores)
+            if idx in metadata
+        ]
     
     def clear(self):
         """Clear all vectors"""
-        self.index = faiss.IndexFlatL2(self.dimension)
-        self.metadata = []
-        self.save()
+        self._check_writable()
+        self._commit(self._new_index(0), lambda: self.db.execute("DELETE FROM metadata"))
 
 
 # Convenience functions
 def index_portfolio(portfolio_data: Dict):
-    """Index portfolio holdings for Q&A"""
-    store = LocalVectorStore()
-    
-    texts = []
-    metadatas = []
-    
-    # Index each holding
-    for holding in portfolio_data.get('holdings', []):
-        text = f"{holding['scheme_name']} - {holding['amc']} - Type: {holding['type']} - Current Value: ₹{holding['current_value']:,.0f} - Units: {holding['units']:.2f}"
-        
-        texts.append(text)
-        metadatas.append({
-            'type': 'holding',
-            'scheme_name': holding['scheme_name'],
-            'folio': holding['folio_number'],
-            'data': holding
-        })
-    
-    # Add portfolio summary
-    summary_text = f"Total portfolio value: ₹{portfolio_data['total_value']:,.0f}, Total invested: ₹{portfolio_data['total_invested']:,.0f}, Total gain: ₹{portfolio_data['total_gain']:,.0f}"
-    texts.append(summary_text)
-    metadatas.append({
-        'type': 'summary',
-        'data': portfolio_data
-    })
-    
-    store.add_texts(texts, metadatas)
-    print(f"✓ Indexed {len(texts)} items")
+    """Index portfolio data for Q&A (see vector_db.portfolio_indexer)"""
+    # Imported here: portfolio_indexer imports this module
+    from vector_db.portfolio_indexer import index_portfolio_data
+    return index_portfolio_data(portfolio_data)
 
 
 if __name__ == "__main__":
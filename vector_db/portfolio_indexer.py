@@ -5,19 +5,8 @@ Following best practices: minimal text processing, full structured data in metad
 """
 from vector_db.faiss_store import LocalVectorStore
 from typing import Dict, List
-import json
-from datetime import date, datetime
 
 
-def json_serial(obj):
-    """
-    JSON serializer for objects not serializable by default json code.
-    Handles date and datetime objects.
-    """
-    if isinstance(obj, (datetime, date)):
-        return obj.isoformat()
-    raise TypeError(f"Type {type(obj)} not serializable")
-
 def index_portfolio_data(portfolio_data: Dict):
     """
     Index portfolio data for RAG (Retrieval Augmented Generation).
@@ -34,38 +23,38 @@ def index_portfolio_data(portfolio_data: Dict):
     """
     store = LocalVectorStore()
     
-    # Clear existing data
-    store.clear()
-    
     texts = []
     metadatas = []
     
     # 1. INDEX PORTFOLIO SUMMARY (raw data)
+    # Look up each summary field once and reuse it for both text and metadata
+    get = portfolio_data.get
+    summary = {
+        'investor_name': get('investor_name', ''),
+        'pan': get('pan', ''),
+        'total_value': get('total_value', 0),
+        'total_invested': get('total_invested', 0),
+        'total_gain': get('total_gain', 0),
+        'total_gain_percent': get('total_gain_percent', 0),
+        'xirr': get('xirr', 0),
+        'num_funds': get('num_funds', 0),
+        'num_active_sips': get('num_active_sips', 0),
+        'num_brokers': get('num_brokers', 0),
+        'data_source': get('data_source', ''),
+        'last_updated': get('last_updated', '')
+    }
     summary_text = (
-        f"Portfolio Summary for {portfolio_data.get('investor_name', 'Investor')}: "
-        f"{portfolio_data.get('num_funds', 0)} funds, "
-        f"Total value ₹{portfolio_data.get('total_value', 0):,.0f}, "
-        f"Total invested ₹{portfolio_data.get('total_invested', 0):,.0f}, "
-        f"Returns {portfolio_data.get('total_gain_percent', 0):.2f}%, "
-        f"XIRR {portfolio_data.get('xirr', 0):.2f}%"
+        f"Portfolio Summary for {get('investor_name', 'Investor')}: "
+        f"{summary['num_funds']} funds, "
+        f"Total value ₹{summary['total_value']:,.0f}, "
+        f"Total invested ₹{summary['total_invested']:,.0f}, "
+        f"Returns {summary['total_gain_percent']:.2f}%, "
+        f"XIRR {summary['xirr']:.2f}%"
     )
     texts.append(summary_text)
     metadatas.append({
         'type': 'portfolio_summary',
-        'data': json.dumps({
-            'investor_name': portfolio_data.get('investor_name', ''),
-            'pan': portfolio_data.get('pan', ''),
-            'total_value': portfolio_data.get('total_value', 0),
-            'total_invested': portfolio_data.get('total_invested', 0),
-            'total_gain': portfolio_data.get('total_gain', 0),
-            'total_gain_percent': portfolio_data.get('total_gain_percent', 0),
-            'xirr': portfolio_data.get('xirr', 0),
-            'num_funds': portfolio_data.get('num_funds', 0),
-            'num_active_sips': portfolio_data.get('num_active_sips', 0),
-            'num_brokers': portfolio_data.get('num_brokers', 0),
-            'data_source': portfolio_data.get('data_source', ''),
-            'last_updated': portfolio_data.get('last_updated', '')
-        })
+        'data': summary
     })
     
     # 2. INDEX EACH HOLDING (complete raw data)
@@ -90,7 +79,7 @@ def index_portfolio_data(portfolio_data: Dict):
             'fund_category': holding.get('type', 'EQUITY'),  # EQUITY, DEBT, HYBRID
             'scheme_name': holding.get('scheme_name', ''),
             'amc': holding.get('amc', ''),
-            'data': json.dumps(holding, default=json_serial)  # Complete unprocessed data
+            'data': holding  # Complete unprocessed data
         })
     
     # 3. INDEX EACH SIP (complete raw data)
@@ -122,7 +111,7 @@ def index_portfolio_data(portfolio_data: Dict):
             'frequency': frequency.lower(),
             'scheme_name': sip.get('scheme_name', ''),
             'broker': sip.get('broker', 'Direct'),
-            'data': json.dumps(sip, default=json_serial)  # Complete unprocessed data
+            'data': sip  # Complete unprocessed data
         })
     
     # 4. INDEX BROKER INFORMATION (raw data)
@@ -139,7 +128,7 @@ def index_portfolio_data(portfolio_data: Dict):
         metadatas.append({
             'type': 'broker',
             'broker_name': broker_name,
-            'data': json.dumps(broker_data, default=json_serial)
+            'data': broker_data
         })
     
     # 5. INDEX AGGREGATION MAP (for understanding duplicate funds)
@@ -156,12 +145,12 @@ def index_portfolio_data(portfolio_data: Dict):
             metadatas.append({
                 'type': 'aggregation',
                 'scheme_key': scheme_key,
-                'data': json.dumps(agg_info, default=json_serial)
+                'data': agg_info
             })
     
-    # Index in FAISS
+    # Index in FAISS, replacing the previous contents in a single write
     if texts:
-        store.add_texts(texts, metadatas)
+        store.replace_all(texts, metadatas)
         print(f"✓ Indexed {len(texts)} items in FAISS for RAG")
         print(f"  - 1 portfolio summary")
         print(f"  - {len(portfolio_data.get('holdings', []))} holdings")